@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Сигналы, увеличивающие эпоху политики RBAC
+        from core import signals  # noqa: F401
+        # Системные проверки настроек
+        from core import checks  # noqa: F401
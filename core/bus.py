@@ -0,0 +1,271 @@
+"""
+Шина инвалидации внутрипроцессных кэшей между воркерами и узлами.
+
+Топики версионированы:
+  • без ключа (например, эпоха политики RBAC) — publish() увеличивает строку
+    Epoch с именем топика, подписчики получают новую версию;
+  • с ключом (например, "user" + user_id) — точечная инвалидация одной записи.
+
+Бэкенды (INVALIDATION_BUS):
+  • inprocess — только текущий процесс (для тестов и одиночного воркера);
+  • polling   — фоновый поток раз в INVALIDATION_BUS_POLL_INTERVAL секунд читает
+                строки Epoch и журнал ключевых событий BusEvent;
+  • pgnotify  — PostgreSQL LISTEN/NOTIFY, доставка сразу после коммита.
+
+Подписчик — callable(topic, key, version); key=None означает "изменилось всё в топике".
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from core.models import BusEvent, Epoch
+
+logger = logging.getLogger(__name__)
+
+
+def increment_epoch(name: str) -> int:
+    """Атомарно увеличивает версию топика и возвращает новое значение."""
+    updated = Epoch.objects.filter(name=name).update(value=F("value") + 1, updated_at=timezone.now())
+    if not updated:
+        _, created = Epoch.objects.get_or_create(name=name, defaults={"value": 1})
+        if not created:
+            Epoch.objects.filter(name=name).update(value=F("value") + 1, updated_at=timezone.now())
+    return Epoch.objects.filter(name=name).values_list("value", flat=True).first()
+
+
+class InvalidationBus:
+    """Базовая шина: локальная доставка подписчикам текущего процесса."""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._subscribers = {}  # topic -> [callback]
+        self._lock = threading.Lock()
+        self._started_pid = None
+
+    def subscribe(self, topic: str, callback):
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(callback)
+
+    def publish(self, topic: str, key=None):
+        """
+        Публикует изменение. Топик без ключа получает новую версию (строка Epoch).
+        Возвращает версию (или None для ключевых событий).
+        """
+        version = increment_epoch(topic) if key is None else None
+        self.dispatch(topic, key, version)
+        self._broadcast(topic, key, version)
+        return version
+
+    def dispatch(self, topic: str, key, version):
+        for callback in list(self._subscribers.get(topic, ())):
+            try:
+                callback(topic, key, version)
+            except Exception:
+                logger.exception("Ошибка подписчика шины инвалидации (%s)", topic)
+
+    def start(self):
+        """Запускает фоновую доставку (один раз на процесс, в том числе после fork)."""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self.origin = uuid.uuid4().hex
+        self._start()
+
+    def _broadcast(self, topic: str, key, version):
+        pass
+
+    def _start(self):
+        pass
+
+
+class InProcessBus(InvalidationBus):
+    """Только текущий процесс."""
+
+
+class PollingBus(InvalidationBus):
+    """
+    Опрос БД раз в interval секунд.
+
+    Ключевые события (изменение одного пользователя) копятся за интервал и
+    одной вставкой пишутся в журнал BusEvent; остальные воркеры читают журнал
+    по id и получают точечные инвалидации — кэш целиком не сбрасывается.
+    Свои события (origin) не доставляются повторно. Строки, закоммиченные
+    позже строк с большим id, ловятся повторным чтением окна прошлого опроса.
+    Если за интервал накопилось больше max_batch событий — сброс топика целиком.
+
+    Топики без ключа — строки Epoch; собственные увеличения версии не
+    доставляются себе повторно.
+    Задержка доставки — не больше двух интервалов опроса.
+    """
+
+    def __init__(self, interval: float = 1.0, *, max_batch: int = 10000, retention: float = 600.0):
+        super().__init__()
+        self.interval = interval
+        self.max_batch = max_batch
+        self.retention = retention
+        self._pending = set()  # (topic, key) для записи в журнал
+        self._seen = {}  # topic -> последняя увиденная версия Epoch
+        self._own_versions = {}  # topic -> версии Epoch, увеличенные этим процессом
+        self._cursor = None  # id журнала: всё до него (кроме окна) уже доставлено
+        self._window = (0, set())  # (нижняя граница окна, id доставленных в окне)
+        self._last_prune = 0.0
+
+    def _broadcast(self, topic, key, version):
+        with self._lock:
+            if key is not None:
+                self._pending.add((topic, key))
+            else:
+                self._own_versions.setdefault(topic, set()).add(version)
+
+    def _start(self):
+        threading.Thread(target=self._run, name="invalidation-bus-poll", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Ошибка опроса шины инвалидации")
+                close_old_connections()
+            time.sleep(self.interval)
+
+    def poll(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if pending:
+            BusEvent.objects.bulk_create(
+                [BusEvent(topic=topic, key=json.dumps(key), origin=self.origin) for topic, key in pending]
+            )
+        self._poll_events()
+        self._poll_epochs()
+        if time.monotonic() - self._last_prune > self.retention / 10:
+            self._last_prune = time.monotonic()
+            BusEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=self.retention)).delete()
+
+    def _poll_events(self):
+        topics = list(self._subscribers)
+        if self._cursor is None:
+            # Первый опрос: история до запуска не нужна
+            self._cursor = BusEvent.objects.aggregate(last=Max("id"))["last"] or 0
+            self._window = (self._cursor, set())
+            return
+
+        floor, delivered = self._window
+        rows = list(
+            BusEvent.objects.filter(id__gt=floor, topic__in=topics)
+            .order_by("id").values_list("id", "topic", "key", "origin")[:self.max_batch + 1]
+        )
+        if len(rows) > self.max_batch:
+            # Отстали слишком сильно — дешевле сбросить топики целиком
+            self._cursor = BusEvent.objects.aggregate(last=Max("id"))["last"] or self._cursor
+            self._window = (self._cursor, set())
+            for topic in topics:
+                self.dispatch(topic, None, None)
+            return
+
+        for event_id, topic, key, origin in rows:
+            if event_id not in delivered and origin != self.origin:
+                self.dispatch(topic, json.loads(key), None)
+        # Окно следующего опроса начинается с курсора этого: строки, закоммиченные
+        # с опозданием до одного интервала, ещё будут прочитаны
+        cursor = max(self._cursor, max((row[0] for row in rows), default=0))
+        self._window = (self._cursor, {row[0] for row in rows if row[0] > self._cursor})
+        self._cursor = cursor
+
+    def _poll_epochs(self):
+        topics = list(self._subscribers)
+        for name, value in Epoch.objects.filter(name__in=topics).values_list("name", "value"):
+            previous = self._seen.get(name)
+            self._seen[name] = value
+            if previous is None or previous == value:
+                continue
+            with self._lock:
+                own = self._own_versions.pop(name, set())
+                foreign = any(version not in own for version in range(previous + 1, value + 1))
+                self._own_versions[name] = {version for version in own if version > value}
+            # Только свои увеличения — подписчики уже получили их в publish()
+            if foreign:
+                self.dispatch(name, None, value)
+        for name in topics:
+            self._seen.setdefault(name, 0)
+
+
+class PgNotifyBus(InvalidationBus):
+    """PostgreSQL LISTEN/NOTIFY: NOTIFY уходит вместе с коммитом транзакции."""
+
+    def __init__(self, channel: str = "auth_invalidation", reconnect_delay: float = 1.0):
+        super().__init__()
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+
+    def _broadcast(self, topic, key, version):
+        payload = json.dumps({"t": topic, "k": key, "v": version, "o": self.origin})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _start(self):
+        threading.Thread(target=self._run, name="invalidation-bus-listen", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Соединение LISTEN потеряно, переподключение")
+            # Пока соединения не было, события могли потеряться — сбрасываем всё
+            for topic in list(self._subscribers):
+                self.dispatch(topic, None, None)
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        # Отдельное соединение драйвера (psycopg2) только для LISTEN
+        raw = connection.get_new_connection(connection.get_connection_params())
+        try:
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([raw], [], [], 60) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    self._receive(raw.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+    def _receive(self, payload: str):
+        message = json.loads(payload)
+        if message.get("o") == self.origin:
+            return  # своё событие уже доставлено локально
+        self.dispatch(message["t"], message.get("k"), message.get("v"))
+
+
+def build_bus(backend: str | None = None) -> InvalidationBus:
+    backend = backend or getattr(settings, "INVALIDATION_BUS", "polling")
+    if backend == "pgnotify":
+        return PgNotifyBus(getattr(settings, "INVALIDATION_BUS_CHANNEL", "auth_invalidation"))
+    if backend == "polling":
+        return PollingBus(getattr(settings, "INVALIDATION_BUS_POLL_INTERVAL", 1.0))
+    return InProcessBus()
+
+
+bus = build_bus()
+
+
+def publish_on_commit(topic: str, key=None):
+    """Публикация после коммита текущей транзакции (в autocommit — сразу)."""
+    transaction.on_commit(lambda: bus.publish(topic, key))
@@ -0,0 +1,33 @@
+"""Системные проверки настроек (manage.py check, runserver, migrate)."""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from core.routers import replicas
+
+# Кэши внутри одного процесса: метка, поставленная одним воркером, не видна другим
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.database, Tags.caches)
+def check_read_your_writes_cache(app_configs, **kwargs):
+    if not replicas():
+        return []
+    alias = getattr(settings, "READ_YOUR_WRITES_CACHE", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend is None:
+        return [Error(
+            f"READ_YOUR_WRITES_CACHE='{alias}' нет в CACHES.",
+            id="core.E001",
+        )]
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"Заданы реплики (DATABASE_REPLICAS), а кэш меток read-your-writes '{alias}' — {backend}: "
+            "метка закрепления за основной БД не видна другим воркерам.",
+            hint="Укажите в CACHES общий кэш (Redis, Memcached, DatabaseCache) и READ_YOUR_WRITES_CACHE.",
+            id="core.E002",
+        )]
+    return []
@@ -0,0 +1,51 @@
+"""
+Условные GET (ETag / If-None-Match) для редко меняющихся ответов.
+
+ETag строится из версии данных, известной без чтения самих данных:
+updated_at объекта, уже загруженного middleware, или эпохи политики RBAC.
+Поэтому совпадение If-None-Match проверяется до запроса к БД и отвечается
+304 без сериализации.
+
+Заголовки рассчитаны на общий кэш перед приложением: Vary: Authorization
+(ответ у каждого токена свой) и Accept (JSON и Browsable API — разные тела),
+must-revalidate — кэш может хранить ответ на запрос с Authorization,
+но перед выдачей после max-age перепроверяет его у приложения.
+"""
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def make_etag(request, *parts) -> str:
+    """Сильный ETag из частей версии и формата ответа."""
+    renderer = getattr(request, "accepted_renderer", None)
+    return '"%s"' % "-".join(str(part) for part in (*parts, getattr(renderer, "format", "")))
+
+
+def timestamp_version(value) -> int:
+    """datetime -> целое число микросекунд (для ETag по updated_at)."""
+    return int(value.timestamp() * 1_000_000)
+
+
+def patch_conditional_headers(response, etag: str, max_age: int = 0):
+    response["ETag"] = etag
+    patch_cache_control(response, max_age=max_age, must_revalidate=True)
+    patch_vary_headers(response, ("Authorization", "Accept"))
+    return response
+
+
+def not_modified(request, etag: str, max_age: int = 0):
+    """304 с заголовками кэширования, если If-None-Match совпал с etag; иначе None."""
+    if request.method not in CONDITIONAL_METHODS:
+        return None
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    # Для If-None-Match сравнение слабое: W/"x" совпадает с "x"
+    etags = {value.removeprefix("W/") for value in parse_etags(header)}
+    if "*" not in etags and etag not in etags:
+        return None
+    return patch_conditional_headers(HttpResponseNotModified(), etag, max_age)
@@ -1,16 +1,71 @@
+from django.db.models import Q
 from rest_framework import status
 from rest_framework.response import Response
 
 from core.permissions import check_permission
+from core.policy import mask_allows
 
 
 class AccessControlMixin:
     """
     Миксин для проверки прав доступа пользователя к бизнес-элементам.
-    Использует функцию check_permission() из core/permissions.py.
+    Использует функцию check_permission() из core/permissions.py,
+    либо маски прав из токена (request.token_permissions), если middleware
+    признал их актуальными.
     """
 
     element_name = None  # название бизнес-объекта (например, "users", "products" и т.п.)
+    owner_field = None   # поле модели с id владельца объекта (для users — "id")
+
+    def has_permission(self, request, action: str, *, is_owner: bool = False) -> bool:
+        """Проверка права: по маскам из токена без БД, иначе — через check_permission()."""
+        token_permissions = getattr(request, "token_permissions", None)
+        if token_permissions is not None:
+            return mask_allows(token_permissions.get(self.element_name, 0), action, is_owner=is_owner)
+        return check_permission(request.user, self.element_name, action, is_owner=is_owner)
+
+    def is_owner(self, request, obj) -> bool:
+        """Принадлежит ли объект текущему пользователю (по owner_field)."""
+        if self.owner_field is None:
+            return False
+        return obj.serializable_value(self.owner_field) == request.user.id
+
+    def scope_filter(self, request, action: str = "read"):
+        """
+        Фильтр объектов, доступных для действия (read, update, delete):
+          • Q()                       → все объекты (*_all);
+          • Q(<owner_field>=user.id)  → только свои;
+          • None                      → доступа нет.
+        """
+        if self.has_permission(request, action, is_owner=False):
+            return Q()
+        if self.has_permission(request, action, is_owner=True):
+            if self.owner_field is None:
+                return Q(pk__in=[])  # владелец не определён — своих объектов нет
+            return Q(**{self.owner_field: request.user.id})
+        return None
+
+    def scoped_queryset(self, request, base_qs, action: str = "read"):
+        """
+        Применяет права к QuerySet на стороне БД.
+
+        Возвращает кортеж (qs, resp) — как check_read_scope():
+          • qs   — base_qs, отфильтрованный по scope_filter();
+          • resp — None, либо Response(...) с ошибкой 401 или 403.
+
+        Пример:
+            qs, resp = self.scoped_queryset(request, User.objects.all())
+            if resp:
+                return resp
+        """
+        user = getattr(request, "user", None)
+        if not getattr(user, "id", None):
+            return None, Response({"detail": "Не авторизован"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        condition = self.scope_filter(request, action)
+        if condition is None:
+            return None, Response({"detail": "Доступ запрещён"}, status=status.HTTP_403_FORBIDDEN)
+        return base_qs.filter(condition), None
 
     def check_read_scope(self, request):
         """
@@ -35,11 +90,11 @@ class AccessControlMixin:
             return None, Response({"detail": "Не авторизован"}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Проверка: может ли читать всё
-        if check_permission(user, self.element_name, "read", is_owner=False):
+        if self.has_permission(request, "read", is_owner=False):
             return "all", None
 
         # Проверка: может ли читать только свои
-        if check_permission(user, self.element_name, "read", is_owner=True):
+        if self.has_permission(request, "read", is_owner=True):
             return "own_only", None
 
         # Иначе — доступ запрещён
@@ -69,7 +124,7 @@ class AccessControlMixin:
             return Response({"detail": "Не авторизован"}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Проверяем права
-        if not check_permission(user, self.element_name, action, is_owner=is_owner):
+        if not self.has_permission(request, action, is_owner=is_owner):
             return Response({"detail": "Доступ запрещён"}, status=status.HTTP_403_FORBIDDEN)
 
         return None
@@ -52,3 +52,29 @@ class AccessRoleRule(BaseModel):
 
     def __str__(self):
         return f"{self.role} - {self.element}"
+
+
+class Epoch(BaseModel):
+    """
+    Именованный счётчик версий (например, эпоха политики RBAC).
+    Увеличивается при изменениях, по нему процессы понимают, что их кэши устарели.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+class BusEvent(models.Model):
+    """
+    Журнал точечных событий шины инвалидации (бэкенд polling): topic + key.
+    Воркеры читают его по возрастанию id; старые строки удаляются самой шиной.
+    """
+    topic = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)  # JSON: сохраняет тип ключа (int id пользователя)
+    origin = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.topic}:{self.key}"
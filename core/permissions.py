@@ -1,4 +1,4 @@
-from core.models import AccessRoleRule
+from core.policy import get_policy_snapshot, mask_allows
 from users.models import User
 
 
@@ -9,21 +9,26 @@ def check_permission(
         *,
         is_owner: bool = False
 ) -> bool:
-    """Проверяет права доступа пользователя к бизнес-элементу"""
-    # ищем правило, которое подходит под роль пользователя и элемент
-    rule = AccessRoleRule.objects.filter(role_id=user.role_id, element__name=element_name).first()
-
-    # если нет — сразу False
-    if not rule:
-        return False
-
-    if action == "create":
-        return bool(rule.create_permission)
-    # берём из правила нужные флаги
-    all_flag = getattr(rule, f"{action}_all_permission", False)
-    own_flag = getattr(rule, f"{action}_permission", False)
+    """
+    Проверяет права доступа пользователя к бизнес-элементу.
+    Правила берутся из снимка политики в памяти (O(1), без запросов к БД).
+    """
+    # маска правила для роли пользователя и элемента (0 — правила нет)
+    mask = get_policy_snapshot().mask(user.role_id, element_name)
 
     # Доступ разрешён если:
     # - разрешено для всех объектов ИЛИ
     # - разрешено для своих объектов И пользователь является владельцем
-    return bool(all_flag or (is_owner and own_flag))
+    return mask_allows(mask, action, is_owner=is_owner)
+
+
+def check_permissions(user: User, checks) -> list[bool]:
+    """
+    Пакетная проверка: checks — список (element_name, action, is_owner).
+    Все ответы берутся из одного снимка политики (одна эпоха на весь пакет).
+    """
+    snapshot = get_policy_snapshot()
+    return [
+        mask_allows(snapshot.mask(user.role_id, element_name), action, is_owner=is_owner)
+        for element_name, action, is_owner in checks
+    ]
@@ -0,0 +1,205 @@
+"""
+Компактное представление политики RBAC.
+
+Правило AccessRoleRule сворачивается в битовую маску. Все правила собираются
+в снимок PolicySnapshot: role_id -> element_id -> mask, имена элементов
+интернированы в id, роли доступны по имени. Снимок перестраивается целиком
+(и атомарно подменяется), когда меняется эпоха политики — её увеличивает
+любое изменение Role, BusinessElement или AccessRoleRule (см. core/signals.py).
+
+Набор масок роли ({element_name: mask}) может быть вшит в access-токен вместе
+с эпохой политики. Пока эпоха в токене совпадает с текущей — права
+проверяются без обращения к БД.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from core.bus import bus
+from core.models import AccessRoleRule, BusinessElement, Epoch, Role
+
+POLICY_EPOCH = "rbac_policy"
+
+# Биты прав (порядок фиксирован — маски попадают в токены)
+PERM_READ = 1 << 0
+PERM_READ_ALL = 1 << 1
+PERM_CREATE = 1 << 2
+PERM_UPDATE = 1 << 3
+PERM_UPDATE_ALL = 1 << 4
+PERM_DELETE = 1 << 5
+PERM_DELETE_ALL = 1 << 6
+
+RULE_FLAGS = (
+    ("read_permission", PERM_READ),
+    ("read_all_permission", PERM_READ_ALL),
+    ("create_permission", PERM_CREATE),
+    ("update_permission", PERM_UPDATE),
+    ("update_all_permission", PERM_UPDATE_ALL),
+    ("delete_permission", PERM_DELETE),
+    ("delete_all_permission", PERM_DELETE_ALL),
+)
+
+# action -> (бит "свои", бит "все")
+ACTION_BITS = {
+    "read": (PERM_READ, PERM_READ_ALL),
+    "update": (PERM_UPDATE, PERM_UPDATE_ALL),
+    "delete": (PERM_DELETE, PERM_DELETE_ALL),
+}
+
+
+def rule_to_mask(flags) -> int:
+    """Сворачивает флаги правила (объект или dict) в битовую маску."""
+    get = flags.get if isinstance(flags, dict) else (lambda name: getattr(flags, name))
+    mask = 0
+    for field, bit in RULE_FLAGS:
+        if get(field):
+            mask |= bit
+    return mask
+
+
+def mask_allows(mask: int, action: str, *, is_owner: bool = False) -> bool:
+    """
+    Те же правила, что в check_permission:
+    create — по флагу create; остальные — *_all, либо свой объект и *_permission.
+    """
+    if action == "create":
+        return bool(mask & PERM_CREATE)
+    bits = ACTION_BITS.get(action)
+    if not bits:
+        return False
+    own_bit, all_bit = bits
+    return bool(mask & all_bit or (is_owner and mask & own_bit))
+
+
+def mask_to_flags(mask: int) -> dict[str, bool]:
+    """Маска -> {"read": .., "read_all": .., ...} (имена полей правила без "_permission")."""
+    return {field.removesuffix("_permission"): bool(mask & bit) for field, bit in RULE_FLAGS}
+
+
+class PolicySnapshot:
+    """Неизменяемый снимок политики RBAC на определённую эпоху."""
+
+    def __init__(self, epoch: int, roles, elements, rules):
+        self.epoch = epoch
+        self.roles_by_id = {role.id: role for role in roles}
+        self.roles_by_name = {role.name: role for role in roles}
+        self.element_ids = {element.name: element.id for element in elements}
+        self.element_names = {element.id: element.name for element in elements}
+        self.masks = {}  # role_id -> {element_id: mask}
+        for row in rules:
+            mask = rule_to_mask(row)
+            if mask:
+                self.masks.setdefault(row["role_id"], {})[row["element_id"]] = mask
+
+    @classmethod
+    def load(cls, epoch: int) -> "PolicySnapshot":
+        return cls(
+            epoch,
+            list(Role.objects.all()),
+            list(BusinessElement.objects.all()),
+            AccessRoleRule.objects.values("role_id", "element_id", *(field for field, _ in RULE_FLAGS)),
+        )
+
+    def mask(self, role_id, element_name: str) -> int:
+        element_id = self.element_ids.get(element_name)
+        if element_id is None:
+            return 0
+        return self.masks.get(role_id, {}).get(element_id, 0)
+
+    def role_masks(self, role_id) -> dict[str, int]:
+        """{element_name: mask} роли (нулевые не включаются)."""
+        return {self.element_names[eid]: mask for eid, mask in self.masks.get(role_id, {}).items()}
+
+    def effective_permissions(self, role_id) -> dict[str, dict[str, bool]]:
+        """Флаги роли по всем бизнес-элементам, включая элементы без правила."""
+        masks = self.masks.get(role_id, {})
+        return {name: mask_to_flags(masks.get(eid, 0)) for name, eid in sorted(self.element_ids.items())}
+
+    def role_by_name(self, name: str):
+        return self.roles_by_name.get(name)
+
+    def role_name(self, role_id) -> str | None:
+        role = self.roles_by_id.get(role_id)
+        return role.name if role else None
+
+
+class _EpochCache:
+    """Значение эпохи, перечитываемое из БД не чаще раза в ttl секунд."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = 0.0
+
+    def get(self, ttl: float) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not None and now - self._fetched_at < ttl:
+                return self._value
+        value = read_policy_epoch()
+        with self._lock:
+            self._value, self._fetched_at = value, now
+        return value
+
+    def set(self, value: int | None):
+        with self._lock:
+            self._value, self._fetched_at = value, time.monotonic()
+
+
+_epoch_cache = _EpochCache()
+
+
+def read_policy_epoch() -> int:
+    """Эпоха политики прямо из БД — без кэша, для ответов, которые не могут отставать."""
+    return Epoch.objects.filter(name=POLICY_EPOCH).values_list("value", flat=True).first() or 0
+
+
+def get_policy_epoch() -> int:
+    """Текущая эпоха политики RBAC (с кэшем на RBAC_POLICY_EPOCH_TTL секунд)."""
+    return _epoch_cache.get(getattr(settings, "RBAC_POLICY_EPOCH_TTL", 5))
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_policy_snapshot() -> PolicySnapshot:
+    """Снимок политики для текущей эпохи; перестраивается, если эпоха сменилась."""
+    global _snapshot
+    epoch = get_policy_epoch()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.epoch == epoch:
+        return snapshot
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.epoch != epoch:
+            snapshot = _snapshot = PolicySnapshot.load(epoch)
+    return snapshot
+
+
+def role_permission_masks(role_id) -> dict[str, int]:
+    """Маски роли по всем элементам: {element_name: mask} (нулевые не включаются)."""
+    if role_id is None:
+        return {}
+    return get_policy_snapshot().role_masks(role_id)
+
+
+def bump_policy_epoch():
+    """
+    Увеличивает эпоху политики: через шину инвалидации снимки во всех
+    процессах перестраиваются, токены со старой эпохой уходят на проверку через снимок.
+    """
+    bus.publish(POLICY_EPOCH)
+
+
+def _on_policy_changed(topic, key, version):
+    """Подписчик шины: новая эпоха (или None — перечитать из БД) и сброс снимка."""
+    global _snapshot
+    _epoch_cache.set(version)
+    with _snapshot_lock:
+        _snapshot = None
+
+
+bus.subscribe(POLICY_EPOCH, _on_policy_changed)
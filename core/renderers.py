@@ -0,0 +1,83 @@
+"""
+JSON-рендерер и парсер DRF по умолчанию (REST_FRAMEWORK в settings).
+
+Кодирование и разбор через orjson (в requirements.txt; в разы быстрее
+stdlib json на больших списках); без него — стандартные JSONRenderer/JSONParser
+DRF. Формат ответа тот же: UTF-8 без экранирования, datetime в ISO 8601
+с "Z" для UTC, Decimal/UUID/ленивые строки — как у JSONEncoder DRF,
+NaN/Infinity при STRICT_JSON отклоняются в обоих вариантах.
+"""
+
+import math
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # без orjson — stdlib json через базовые классы DRF
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_encoder = JSONEncoder()
+
+
+# Типы, которые не могут содержать NaN/Infinity, — пропускаются без разбора
+_FINITE_LEAVES = frozenset((str, int, bool, type(None)))
+
+
+def _check_finite(value):
+    """ValueError, как у json.dumps(allow_nan=False), если в данных есть NaN/Infinity."""
+    kind = type(value)
+    if kind in _FINITE_LEAVES:
+        return
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        if (isinstance(value, float) and not math.isfinite(value)) or (
+                isinstance(value, Decimal) and not value.is_finite()):
+            raise ValueError("Out of range float values are not JSON compliant")
+        return
+    for item in value:
+        if type(item) is dict:
+            # Частый случай — список строк-словарей: без вызова функции на строку
+            for field in item.values():
+                if type(field) not in _FINITE_LEAVES:
+                    _check_finite(field)
+        elif type(item) not in _FINITE_LEAVES:
+            _check_finite(item)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Отступы (?indent / Accept: ...; indent=N) — редкий отладочный случай, отдаём базовому классу
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+        # orjson пишет NaN/Infinity как null; DRF при STRICT_JSON отказывается их кодировать.
+        # Без литерала null в ответе таких значений нет — обход данных не нужен.
+        if self.strict and b"null" in content:
+            _check_finite(data)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read() if stream is not None else b""
+            if encoding.lower().replace("-", "") != "utf8":
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,104 @@
+"""
+Маршрутизация запросов к БД: запись — в основную (default), чтение — в реплики.
+
+Реплики — алиасы DATABASES из DATABASE_REPLICAS. Чтение уходит в реплику,
+только пока идёт безопасный (GET/HEAD/OPTIONS) HTTP-запрос, размеченный
+ReadYourWritesMiddleware. Вне HTTP (команды, фоновые потоки шины), внутри
+транзакций и в запросах с записью чтение идёт в основную БД.
+
+Read-your-writes: после записи запрос до конца читает из основной БД, а
+субъект закрепляется за ней на READ_YOUR_WRITES_SECONDS (метка в Django cache
+READ_YOUR_WRITES_CACHE — общая для воркеров, если кэш общий). Так после входа
+(новая token_version) или PATCH профиля пользователь не увидит отставшую реплику.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+PRIMARY_DB = "default"
+
+
+class _RequestState:
+    __slots__ = ("primary", "wrote", "replica")
+
+    def __init__(self, primary: bool):
+        self.primary = primary
+        self.wrote = False
+        self.replica = None
+
+
+_state: ContextVar[_RequestState | None] = ContextVar("db_routing_state", default=None)
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def begin_request(*, primary: bool):
+    """Начало HTTP-запроса; возвращает токен для end_request()."""
+    return _state.set(_RequestState(primary))
+
+
+def end_request(token) -> bool:
+    """Конец HTTP-запроса; True, если в его ходе была запись."""
+    state = _state.get()
+    _state.reset(token)
+    return bool(state and state.wrote)
+
+
+def use_primary():
+    """Оставшиеся чтения текущего запроса — из основной БД."""
+    state = _state.get()
+    if state is not None:
+        state.primary = True
+
+
+def _pin_key(user_id) -> str:
+    return f"db-pin:{user_id}"
+
+
+def pin_primary(user_id):
+    seconds = getattr(settings, "READ_YOUR_WRITES_SECONDS", 5)
+    if user_id and seconds > 0:
+        caches[getattr(settings, "READ_YOUR_WRITES_CACHE", "default")].set(_pin_key(user_id), 1, seconds)
+
+
+def is_pinned(user_id) -> bool:
+    if _state.get() is None:
+        return False
+    return bool(caches[getattr(settings, "READ_YOUR_WRITES_CACHE", "default")].get(_pin_key(user_id)))
+
+
+class PrimaryReplicaRouter:
+    def __init__(self):
+        self.replicas = replicas()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.primary or not self.replicas:
+            return PRIMARY_DB
+        # Чтение внутри транзакции должно видеть её же изменения
+        if connections[PRIMARY_DB].in_atomic_block:
+            return PRIMARY_DB
+        # Одна реплика на запрос — чтения внутри него согласованы между собой
+        if state.replica is None:
+            state.replica = random.choice(self.replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.primary = state.wrote = True
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит репликацией
+        return False if db in self.replicas else None
@@ -0,0 +1,41 @@
+"""
+Сериализация строк без моделей для горячих эндпоинтов.
+
+RowSerializer один раз при импорте фиксирует поля ответа и их источники
+(колонки values_list() или атрибуты модели). Списки читаются кортежами
+values_list() — без создания экземпляров модели и без обхода полей
+ModelSerializer; одиночные объекты — одним attrgetter.
+Значения не преобразуются: datetime и прочее сериализует JSON-рендерер.
+"""
+
+from operator import attrgetter
+
+
+class RowSerializer:
+    """
+    RowSerializer("id", "email", ("role", "role_id")) — имя поля в ответе
+    либо пара (имя в ответе, колонка/атрибут модели).
+    """
+
+    def __init__(self, *fields):
+        pairs = [(field, field) if isinstance(field, str) else tuple(field) for field in fields]
+        self.names = tuple(name for name, _ in pairs)
+        self.sources = tuple(source for _, source in pairs)
+        getter = attrgetter(*self.sources)
+        # attrgetter с одним атрибутом возвращает значение, а не кортеж
+        self._get = getter if len(self.sources) > 1 else (lambda obj: (getter(obj),))
+
+    def values_list(self, queryset, *extra):
+        """Кортежи колонок sources (+ extra в конце, в ответ не попадают)."""
+        return queryset.values_list(*self.sources, *(column for column in extra if column not in self.sources))
+
+    def one(self, row) -> dict:
+        return dict(zip(self.names, row))
+
+    def many(self, rows) -> list[dict]:
+        names = self.names
+        # zip останавливается на names — лишние колонки (extra) отбрасываются
+        return [dict(zip(names, row)) for row in rows]
+
+    def from_instance(self, obj) -> dict:
+        return dict(zip(self.names, self._get(obj)))
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import AccessRoleRule, BusinessElement, Role
+from core.policy import bump_policy_epoch
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=BusinessElement)
+@receiver(post_delete, sender=BusinessElement)
+@receiver(post_save, sender=AccessRoleRule)
+@receiver(post_delete, sender=AccessRoleRule)
+def policy_changed(sender, **kwargs):
+    """Любое изменение ролей, элементов или правил — новая эпоха политики RBAC."""
+    transaction.on_commit(bump_policy_epoch)
@@ -1,11 +1,13 @@
 from django.urls import path
 
-from core.views_rbac import (RBACElementListView, RBACRoleListView,
-                             RBACRuleDetailView, RBACRuleListCreateView)
+from core.views_rbac import (RBACEffectivePermissionsView, RBACElementListView,
+                             RBACRoleListView, RBACRuleDetailView,
+                             RBACRuleListCreateView)
 
 app_name = "rbac"
 
 urlpatterns = [
+    path("effective/", RBACEffectivePermissionsView.as_view(), name="rbac_effective"),
     path("roles/", RBACRoleListView.as_view(), name="rbac_roles"),
     path("elements/", RBACElementListView.as_view(), name="rbac_elements"),
     path("rules/", RBACRuleListCreateView.as_view(), name="rbac_rules"),
@@ -1,12 +1,16 @@
 from core.models import Role
+from core.policy import get_policy_snapshot
 
 DEFAULT_USER_ROLE_NAME = "user"
 
 def get_default_user_role():
     """
-    Возвращает объект роли 'user'.
+    Возвращает объект роли 'user' (из снимка политики, без запроса к БД).
     Если её нет в базе — создаёт с описанием 'Обычный пользователь'.
     """
+    role = get_policy_snapshot().role_by_name(DEFAULT_USER_ROLE_NAME)
+    if role is not None:
+        return role
     role, _ = Role.objects.get_or_create(
         name=DEFAULT_USER_ROLE_NAME,
         defaults={"description": "Обычный пользователь"},
@@ -1,13 +1,27 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.conditional import (make_etag, not_modified,
+                              patch_conditional_headers)
 from core.models import AccessRoleRule, BusinessElement, Role
+from core.policy import get_policy_snapshot, read_policy_epoch
+from core.rows import RowSerializer
 from core.serializers import (AccessRoleRuleSerializer,
                               BusinessElementSerializer, RoleSerializer)
 from users.mixins import BaseJWTAPIView
 
+# Списки отдаются кортежами values_list() в формате соответствующих ModelSerializer
+ROLE_ROW = RowSerializer(*RoleSerializer.Meta.fields)
+ELEMENT_ROW = RowSerializer(*BusinessElementSerializer.Meta.fields)
+RULE_ROW = RowSerializer(*(
+    (field, f"{field}_id") if field in ("role", "element") else field
+    for field in AccessRoleRuleSerializer.Meta.fields
+))
+
 
 def ensure_admin(request):
     """
@@ -15,12 +29,51 @@ def ensure_admin(request):
     Возвращает Response(403), если нет прав; иначе None.
     """
     user = getattr(request, "user", None)
-    role = getattr(user, "role", None)
-    if not getattr(user, "id", None) or not role or role.name != "admin":
+    if not getattr(user, "id", None) or get_policy_snapshot().role_name(user.role_id) != "admin":
         return Response({"detail": "Только администратор."}, status=status.HTTP_403_FORBIDDEN)
     return None
 
 
+def catalog_response(request, name: str, row: RowSerializer, queryset):
+    """
+    Список справочника RBAC с ETag по эпохе политики: любое изменение ролей,
+    элементов или правил её увеличивает. Эпоха читается из БД (одна строка), а не
+    из кэша get_policy_epoch(): иначе воркер, ещё не получивший новую эпоху, отвечал
+    бы 304 на устаревший ETag. If-None-Match проверяется до чтения справочника.
+    """
+    etag = make_etag(request, "rbac", name, read_policy_epoch())
+    max_age = getattr(settings, "RBAC_CATALOG_MAX_AGE", 0)
+    response = not_modified(request, etag, max_age)
+    if response is None:
+        response = Response(row.many(row.values_list(queryset)), status=status.HTTP_200_OK)
+    return patch_conditional_headers(response, etag, max_age)
+
+
+class RBACEffectivePermissionsView(BaseJWTAPIView, APIView):
+    """
+    GET /api/rbac/effective/ — права текущего пользователя по всем бизнес-элементам
+    одним ответом: {"epoch", "role", "permissions": {element: {read, read_all, ...}}}.
+    Ответ кэшируется клиентом; при смене эпохи политики его нужно перезапросить.
+    """
+
+    def get(self, request):
+        user = getattr(request, "user", None)
+        if not getattr(user, "id", None):
+            return Response({"detail": "Не авторизован"}, status=status.HTTP_401_UNAUTHORIZED)
+        snapshot = get_policy_snapshot()
+        response = Response(
+            {
+                "epoch": snapshot.epoch,
+                "role": snapshot.role_name(user.role_id),
+                "permissions": snapshot.effective_permissions(user.role_id),
+            },
+            status=status.HTTP_200_OK,
+        )
+        patch_cache_control(response, private=True, max_age=getattr(settings, "RBAC_EFFECTIVE_MAX_AGE", 60))
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
 class RBACRoleListView(BaseJWTAPIView, APIView):
     """GET /api/rbac/roles/ — список ролей (только admin)"""
 
@@ -28,8 +81,7 @@ class RBACRoleListView(BaseJWTAPIView, APIView):
         resp = ensure_admin(request)
         if resp:
             return resp
-        qs = Role.objects.all().order_by("id")
-        return Response(RoleSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+        return catalog_response(request, "roles", ROLE_ROW, Role.objects.order_by("id"))
 
 
 class RBACElementListView(BaseJWTAPIView, APIView):
@@ -39,8 +91,7 @@ class RBACElementListView(BaseJWTAPIView, APIView):
         resp = ensure_admin(request)
         if resp:
             return resp
-        qs = BusinessElement.objects.all().order_by("id")
-        return Response(BusinessElementSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+        return catalog_response(request, "elements", ELEMENT_ROW, BusinessElement.objects.order_by("id"))
 
 
 class RBACRuleListCreateView(BaseJWTAPIView, APIView):
@@ -53,8 +104,7 @@ class RBACRuleListCreateView(BaseJWTAPIView, APIView):
         resp = ensure_admin(request)
         if resp:
             return resp
-        qs = AccessRoleRule.objects.select_related("role", "element").order_by("id")
-        return Response(AccessRoleRuleSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+        return catalog_response(request, "rules", RULE_ROW, AccessRoleRule.objects.order_by("id"))
 
     def post(self, request):
         resp = ensure_admin(request)
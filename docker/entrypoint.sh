@@ -11,6 +11,7 @@ python manage.py migrate --noinput
 
 python manage.py loaddata core/fixtures/core_data.json || true
 python manage.py create_test_users || true
+python manage.py rebuild_token_table
 
 echo " Запуск Django dev-сервера..."
 python manage.py runserver 0.0.0.0:8000
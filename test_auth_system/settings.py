@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -13,6 +14,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: don't run with debug turned on in production!
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 DEBUG = os.getenv("DEBUG", "1") == "1"
+# Запуск через manage.py test
+TESTING = sys.argv[1:2] == ["test"]
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(",")
 
@@ -36,6 +39,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'users.middleware.RequestTraceMiddleware',  # только при заданном REQUEST_TRACE_PATH
+    'users.middleware.ReadYourWritesMiddleware',  # только при заданных DATABASE_REPLICAS
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +86,31 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: хосты PostgreSQL через запятую (host или host:port),
+# БД и учётная запись — как у default. Алиасы replica_1, replica_2, ...
+for _index, _host in enumerate(filter(None, map(str.strip, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","))), 1):
+    _host, _, _port = _host.partition(":")
+    DATABASES[f"replica_{_index}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+# Алиасы DATABASES для чтения (core/routers.py); пусто — всё в default
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+# Тестам маршрутизации — зеркало default (та же тестовая БД под отдельным алиасом);
+# в DATABASE_REPLICAS его включают только сами тесты
+REPLICA_TEST_ALIAS = "replica_test"
+if TESTING:
+    DATABASES[REPLICA_TEST_ALIAS] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+# Сколько секунд после записи чтения пользователя идут в основную БД
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Алиас CACHES для меток закрепления. При заданных репликах нужен общий для воркеров
+# кэш (Redis, Memcached, DatabaseCache): LocMem/Dummy отклоняет проверка core.E002.
+READ_YOUR_WRITES_CACHE = os.getenv("READ_YOUR_WRITES_CACHE", "default")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,4 +154,101 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [],
     'DEFAULT_PERMISSION_CLASSES': [],
+    # orjson, если установлен; иначе stdlib json (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+
+# Кэш пользователей в JWTUserMiddleware (на воркер).
+# Размер 0 отключает кэш; TTL ограничивает окно устаревания между воркерами.
+JWT_PRINCIPAL_CACHE_SIZE = int(os.getenv("JWT_PRINCIPAL_CACHE_SIZE", "10000"))
+JWT_PRINCIPAL_CACHE_TTL = float(os.getenv("JWT_PRINCIPAL_CACHE_TTL", "30"))
+
+# Кэш проверенных JWT (digest токена -> user_id, версия, exp). 0 — выключен.
+JWT_TOKEN_CACHE_SIZE = int(os.getenv("JWT_TOKEN_CACHE_SIZE", "0"))
+
+# Вшивать роль и маски прав в access-токен (авторизация без запросов к БД).
+JWT_EMBED_PERMISSIONS = os.getenv("JWT_EMBED_PERMISSIONS", "0") == "1"
+# Как часто (сек) воркер перечитывает эпоху политики RBAC из БД.
+RBAC_POLICY_EPOCH_TTL = float(os.getenv("RBAC_POLICY_EPOCH_TTL", "5"))
+
+# Общая для воркеров хоста таблица версий токенов (mmap-файл, например /dev/shm/auth_token_versions).
+# Пустой путь — проверка отзыва токенов только через БД.
+JWT_TOKEN_TABLE_PATH = os.getenv("JWT_TOKEN_TABLE_PATH", "")
+JWT_TOKEN_TABLE_SLOTS = int(os.getenv("JWT_TOKEN_TABLE_SLOTS", "262144"))
+
+# Асимметричная подпись JWT: каталог с ключами <kid>.pem / <kid>.pub.pem и активный kid.
+# Пустой каталог — HS256 с SECRET_KEY.
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+JWT_ACCEPT_HS256 = os.getenv("JWT_ACCEPT_HS256", "1") == "1"
+JWT_JWKS_MAX_AGE = int(os.getenv("JWT_JWKS_MAX_AGE", "300"))
+
+# Время жизни токенов: короткий access-токен продлевается через refresh-токен.
+JWT_ACCESS_TOKEN_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", "15"))
+JWT_REFRESH_TOKEN_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_DAYS", "30"))
+
+# Пул хэширования паролей (bcrypt): одновременных хэшей и длина очереди;
+# при переполнении — 503 с Retry-After. 0 потоков — хэширование в потоке запроса.
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "4"))
+PASSWORD_HASHING_QUEUE = int(os.getenv("PASSWORD_HASHING_QUEUE", "32"))
+PASSWORD_HASHING_RETRY_AFTER = int(os.getenv("PASSWORD_HASHING_RETRY_AFTER", "1"))
+
+# Хэширование паролей: алгоритм новых хэшей (bcrypt, argon2id, scrypt) и стоимость.
+# Старые хэши перехэшируются при входе. Подбор стоимости: manage.py calibrate_password_hasher.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 15)))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+
+# Лимит попыток входа (проверяется до bcrypt): "попыток/секунд", пусто — без лимита.
+# Бэкенд: local — в памяти воркера; cache — общий через CACHES[LOGIN_THROTTLE_CACHE].
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "local")
+LOGIN_THROTTLE_CACHE = os.getenv("LOGIN_THROTTLE_CACHE", "default")
+LOGIN_THROTTLE_EMAIL_RATE = os.getenv("LOGIN_THROTTLE_EMAIL_RATE", "10/300")
+LOGIN_THROTTLE_IP_RATE = os.getenv("LOGIN_THROTTLE_IP_RATE", "60/60")
+# Сколько доверенных прокси (nginx, балансировщик) добавляют X-Forwarded-For.
+# 0 — заголовок игнорируется (его подделывает клиент), IP берётся из REMOTE_ADDR.
+LOGIN_THROTTLE_TRUSTED_PROXIES = int(os.getenv("LOGIN_THROTTLE_TRUSTED_PROXIES", "0"))
+
+# Шина инвалидации кэшей между воркерами: inprocess, polling (строки Epoch в БД)
+# или pgnotify (PostgreSQL LISTEN/NOTIFY, доставка сразу после коммита).
+# Под manage.py test — inprocess: фоновый поток опроса писал бы в тестовую БД
+# параллельно тестам (PollingBus проверяется в тестах вызовами poll()).
+INVALIDATION_BUS = "inprocess" if TESTING else os.getenv("INVALIDATION_BUS", "polling")
+INVALIDATION_BUS_POLL_INTERVAL = float(os.getenv("INVALIDATION_BUS_POLL_INTERVAL", "1"))
+INVALIDATION_BUS_CHANNEL = os.getenv("INVALIDATION_BUS_CHANNEL", "auth_invalidation")
+
+# Cache-Control: max-age ответа /api/rbac/effective/ (права текущего пользователя), сек.
+RBAC_EFFECTIVE_MAX_AGE = int(os.getenv("RBAC_EFFECTIVE_MAX_AGE", "60"))
+
+# Cache-Control: max-age ответов с ETag (профиль, справочники RBAC), сек.
+# 0 — общий кэш хранит ответ, но каждый раз перепроверяет его через If-None-Match.
+PROFILE_MAX_AGE = int(os.getenv("PROFILE_MAX_AGE", "0"))
+RBAC_CATALOG_MAX_AGE = int(os.getenv("RBAC_CATALOG_MAX_AGE", "0"))
+
+# Курсорная пагинация GET /api/admin/users/: размер страницы по умолчанию и предел
+# для ?page_size=; порядок — id или created_at (при совпадении — id).
+ADMIN_USERS_PAGE_SIZE = int(os.getenv("ADMIN_USERS_PAGE_SIZE", "50"))
+ADMIN_USERS_MAX_PAGE_SIZE = int(os.getenv("ADMIN_USERS_MAX_PAGE_SIZE", "500"))
+ADMIN_USERS_CURSOR_ORDERING = os.getenv("ADMIN_USERS_CURSOR_ORDERING", "id")
+
+# Выгрузка /api/admin/users/export/: строк за одно чтение серверного курсора.
+ADMIN_EXPORT_CHUNK_SIZE = int(os.getenv("ADMIN_EXPORT_CHUNK_SIZE", "2000"))
+
+# Массовые операции /api/admin/users/bulk/...: максимум элементов в одном запросе.
+ADMIN_BULK_MAX_ITEMS = int(os.getenv("ADMIN_BULK_MAX_ITEMS", "1000"))
+
+# Запись трассы запросов (JSONL) для replay_load; пусто — выключено.
+REQUEST_TRACE_PATH = os.getenv("REQUEST_TRACE_PATH", "")
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from core.bus import bus
+        from users.cache import on_user_changed
+        from users.models import USER_TOPIC
+
+        # Системные проверки настроек
+        from users import checks  # noqa: F401
+
+        # Изменения пользователей на других воркерах сбрасывают локальный кэш
+        bus.subscribe(USER_TOPIC, on_user_changed)
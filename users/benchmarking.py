@@ -0,0 +1,69 @@
+"""
+Утилиты для микробенчмарков горячих путей (используются management-командами bench_*).
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+class QueryCounter:
+    """Считает SQL-запросы через execute_wrapper (без DEBUG и CaptureQueriesContext)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries(using: str = "default"):
+    counter = QueryCounter()
+    with connections[using].execute_wrapper(counter):
+        yield counter
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль по уже отсортированному списку (q от 0 до 100)."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def measure(fn, *, iterations: int = 1000, warmup: int = 50) -> dict:
+    """
+    Прогоняет fn() iterations раз и возвращает:
+      ops_per_sec, p50_us, p99_us, queries_per_call.
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    with count_queries() as counter:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 1) if total else 0.0,
+        "p50_us": round(percentile(timings, 50) * 1e6, 1),
+        "p99_us": round(percentile(timings, 99) * 1e6, 1),
+        "queries_per_call": round(counter.count / iterations, 2),
+    }
+
+
+def format_result(name: str, result: dict) -> str:
+    return (
+        f"{name:<40} {result['ops_per_sec']:>12,.0f} ops/s  "
+        f"p50 {result['p50_us']:>9,.1f} µs  p99 {result['p99_us']:>9,.1f} µs  "
+        f"q/call {result['queries_per_call']:.2f}"
+    )
@@ -0,0 +1,237 @@
+"""
+Внутрипроцессные кэши для горячего пути аутентификации.
+
+PrincipalCache — ограниченный LRU/TTL-кэш пользователей (principal),
+ключ — (user_id, token_version). Параллельные промахи по одному ключу
+схлопываются в один запрос к БД.
+
+TokenCache — кэш результатов проверки JWT (опционально).
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """Загрузка, которую выполняет один поток, а остальные ждут её результат."""
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class PrincipalCache:
+    """
+    LRU-кэш с TTL для объектов пользователя.
+
+    • get_or_load(user_id, token_version, loader) — вернуть пользователя из кэша
+      или загрузить через loader() (один запрос на ключ, даже при гонке);
+    • invalidate(user_id) — сбросить все записи пользователя
+      (вызывается из модели User при любом сохранении);
+    • stats() — счётчики попаданий/промахов.
+
+    Наружу отдаётся копия объекта, чтобы запросы не делили один экземпляр модели.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # (user_id, token_version) -> (expires_at, user)
+        self._by_user = {}  # user_id -> set ключей
+        self._inflight = {}  # ключ -> _Flight
+        self._generation = 0  # растёт при каждой инвалидации
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get_or_load(self, user_id: int, token_version: int, loader):
+        if not self.enabled:
+            return loader()
+
+        key = (user_id, token_version)
+        with self._lock:
+            user = self._get_locked(key)
+            if user is not None:
+                self.hits += 1
+                return copy.copy(user)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+
+        if not leader:
+            # Кто-то уже грузит этого пользователя — ждём его результат
+            flight.event.wait()
+            with self._lock:
+                self.collapsed += 1
+            return copy.copy(flight.result) if flight.result is not None else None
+
+        user = None
+        try:
+            with self._lock:
+                self.misses += 1
+            user = loader()
+            with self._lock:
+                # Не кладём в кэш то, что могло устареть за время загрузки
+                if user is not None and generation == self._generation:
+                    self._put_locked(key, user)
+            return copy.copy(user) if user is not None else None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.result = user
+            flight.event.set()
+
+    def invalidate(self, user_id: int):
+        """Удаляет все закэшированные версии пользователя."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in self._by_user.pop(user_id, ()):
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "collapsed": self.collapsed,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _get_locked(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._drop_locked(key)
+            return None
+        self._data.move_to_end(key)
+        return user
+
+    def _put_locked(self, key, user):
+        self._data[key] = (time.monotonic() + self.ttl, user)
+        self._data.move_to_end(key)
+        self._by_user.setdefault(key[0], set()).add(key)
+        while len(self._data) > self.max_size:
+            old_key, _ = self._data.popitem(last=False)
+            self._unindex_locked(old_key)
+            self.evictions += 1
+
+    def _drop_locked(self, key):
+        self._data.pop(key, None)
+        self._unindex_locked(key)
+
+    def _unindex_locked(self, key):
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+
+def _build_principal_cache() -> PrincipalCache:
+    from django.conf import settings
+    return PrincipalCache(
+        max_size=getattr(settings, "JWT_PRINCIPAL_CACHE_SIZE", 10000),
+        ttl=getattr(settings, "JWT_PRINCIPAL_CACHE_TTL", 30),
+    )
+
+
+principal_cache = _build_principal_cache()
+
+
+def on_user_changed(topic, key, version):
+    """Подписчик шины инвалидации: key — id пользователя, None — сбросить всех."""
+    if key is None:
+        principal_cache.clear()
+    else:
+        principal_cache.invalidate(key)
+
+
+class TokenCache:
+    """
+    Кэш уже проверенных JWT: digest(token) -> (claims, exp).
+
+    Позволяет не выполнять повторно base64/JSON/HMAC для одного и того же
+    токена. Запись живёт не дольше exp самого токена; размер ограничен (LRU).
+    Кэшируются только успешно проверенные токены.
+    """
+
+    def __init__(self, max_size: int = 0):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # digest -> (claims, exp)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, claims: dict, exp: float):
+        with self._lock:
+            self._data[key] = (claims, exp)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _build_token_cache() -> TokenCache:
+    from django.conf import settings
+    return TokenCache(max_size=getattr(settings, "JWT_TOKEN_CACHE_SIZE", 0))
+
+
+token_cache = _build_token_cache()
@@ -0,0 +1,25 @@
+"""Системные проверки настроек пользователей (manage.py check, runserver, migrate)."""
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+from users import hashers
+
+
+@register()
+def check_password_hasher(app_configs, **kwargs):
+    name = getattr(settings, "PASSWORD_HASHER", "bcrypt")
+    if name not in hashers.HASHERS:
+        return [Error(
+            f"Неизвестный PASSWORD_HASHER='{name}'.",
+            hint=f"Допустимые значения: {', '.join(hashers.HASHERS)}.",
+            id="users.E001",
+        )]
+    if name == "argon2id" and hashers.argon2 is None:
+        return [Error(
+            "PASSWORD_HASHER='argon2id', но пакет argon2-cffi не установлен: "
+            "регистрация и смена пароля завершались бы ошибкой 500.",
+            hint="Установите argon2-cffi или выберите bcrypt/scrypt.",
+            id="users.E002",
+        )]
+    return []
@@ -0,0 +1,69 @@
+"""
+Фильтры списка пользователей администратора (GET /api/admin/users/ и выгрузка).
+
+  ?role_id=<id>               — роль;
+  ?is_active=true|false       — активность;
+  ?created_after=<дата/время> — создан не раньше (ISO 8601);
+  ?created_before=<дата/время> — создан раньше;
+  ?q=<строка>                 — префикс email, имени или фамилии (без учёта регистра).
+
+Каждому фильтру соответствует индекс (см. User.Meta.indexes и миграцию 0003).
+"""
+
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+BOOLEAN_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _parse_moment(name: str, value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise FilterError(f"{name}: ожидается дата или дата-время ISO 8601")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_users(qs, params):
+    """
+    Применяет фильтры из query-параметров к QuerySet пользователей.
+    Неверные значения — FilterError с текстом для {"detail": ...}.
+    """
+    role_id = params.get("role_id")
+    if role_id:
+        if not role_id.isdigit():
+            raise FilterError("role_id: ожидается целое число")
+        qs = qs.filter(role_id=int(role_id))
+
+    is_active = params.get("is_active")
+    if is_active:
+        if is_active.lower() not in BOOLEAN_VALUES:
+            raise FilterError("is_active: ожидается true или false")
+        qs = qs.filter(is_active=BOOLEAN_VALUES[is_active.lower()])
+
+    created_after = params.get("created_after")
+    if created_after:
+        qs = qs.filter(created_at__gte=_parse_moment("created_after", created_after))
+    created_before = params.get("created_before")
+    if created_before:
+        qs = qs.filter(created_at__lt=_parse_moment("created_before", created_before))
+
+    search = (params.get("q") or "").strip()
+    if search:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__istartswith": search})
+        qs = qs.filter(condition)
+    return qs
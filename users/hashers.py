@@ -0,0 +1,194 @@
+"""
+Реестр алгоритмов хэширования паролей.
+
+Алгоритм сохранённого хэша определяется по префиксу:
+  • $2a$ / $2b$ / $2y$  — bcrypt;
+  • $argon2id$          — argon2id (нужен пакет argon2-cffi);
+  • $scrypt$            — scrypt (hashlib, формат $scrypt$n=..,r=..,p=..$salt$hash).
+
+Новые пароли хэшируются алгоритмом PASSWORD_HASHER с текущими параметрами
+стоимости. Если хэш сохранён другим алгоритмом или с другой стоимостью,
+verify_password() сообщает об этом — пароль перехэшируется при входе.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+
+import bcrypt
+from django.conf import settings
+
+try:
+    import argon2
+except ImportError:  # argon2id недоступен без argon2-cffi
+    argon2 = None
+
+
+class BasePasswordHasher:
+    algorithm = None
+    prefixes = ()
+
+    def identifies(self, encoded: str) -> bool:
+        return encoded.startswith(self.prefixes)
+
+    def encode(self, raw_password: str) -> str:
+        raise NotImplementedError
+
+    def verify(self, raw_password: str, encoded: str) -> bool:
+        raise NotImplementedError
+
+    def must_update(self, encoded: str) -> bool:
+        """True, если хэш посчитан с другими параметрами стоимости."""
+        return False
+
+
+class BCryptHasher(BasePasswordHasher):
+    algorithm = "bcrypt"
+    prefixes = ("$2b$", "$2y$", "$2a$")
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+    def encode(self, raw_password: str) -> str:
+        return bcrypt.hashpw(raw_password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("utf-8")
+
+    def verify(self, raw_password: str, encoded: str) -> bool:
+        return bcrypt.checkpw(raw_password.encode("utf-8"), encoded.encode("utf-8"))
+
+    def must_update(self, encoded: str) -> bool:
+        return encoded[4:6] != f"{self.rounds:02d}"
+
+
+class Argon2idHasher(BasePasswordHasher):
+    algorithm = "argon2id"
+    prefixes = ("$argon2id$",)
+
+    def __init__(self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 1):
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+
+    @property
+    def _hasher(self):
+        if argon2 is None:
+            raise RuntimeError("Для argon2id установите пакет argon2-cffi.")
+        return argon2.PasswordHasher(
+            time_cost=self.time_cost, memory_cost=self.memory_cost, parallelism=self.parallelism,
+        )
+
+    def encode(self, raw_password: str) -> str:
+        return self._hasher.hash(raw_password)
+
+    def verify(self, raw_password: str, encoded: str) -> bool:
+        try:
+            return self._hasher.verify(encoded, raw_password)
+        except argon2.exceptions.VerificationError:
+            return False
+        except argon2.exceptions.InvalidHashError:
+            return False
+
+    def must_update(self, encoded: str) -> bool:
+        return self._hasher.check_needs_rehash(encoded)
+
+
+class ScryptHasher(BasePasswordHasher):
+    algorithm = "scrypt"
+    prefixes = ("$scrypt$",)
+    dklen = 64
+
+    def __init__(self, n: int = 2 ** 15, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @staticmethod
+    def _derive(raw_password: str, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+        return hashlib.scrypt(
+            raw_password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=dklen,
+            maxmem=256 * n * r * p + 1024 * 1024,
+        )
+
+    def encode(self, raw_password: str) -> str:
+        salt = os.urandom(16)
+        derived = self._derive(raw_password, salt, self.n, self.r, self.p, self.dklen)
+        return "$scrypt$n={},r={},p={}${}${}".format(
+            self.n, self.r, self.p, _b64encode(salt), _b64encode(derived),
+        )
+
+    @staticmethod
+    def _parse(encoded: str):
+        _, _, params, salt, derived = encoded.split("$")
+        values = dict(item.split("=") for item in params.split(","))
+        return int(values["n"]), int(values["r"]), int(values["p"]), _b64decode(salt), _b64decode(derived)
+
+    def verify(self, raw_password: str, encoded: str) -> bool:
+        try:
+            n, r, p, salt, derived = self._parse(encoded)
+        except (ValueError, KeyError):
+            return False
+        candidate = self._derive(raw_password, salt, n, r, p, len(derived))
+        return hmac.compare_digest(candidate, derived)
+
+    def must_update(self, encoded: str) -> bool:
+        try:
+            n, r, p, _, _ = self._parse(encoded)
+        except (ValueError, KeyError):
+            return True
+        return (n, r, p) != (self.n, self.r, self.p)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def build_hashers() -> dict[str, BasePasswordHasher]:
+    """Хэшеры с параметрами стоимости из настроек."""
+    return {
+        "bcrypt": BCryptHasher(rounds=getattr(settings, "BCRYPT_ROUNDS", 12)),
+        "argon2id": Argon2idHasher(
+            time_cost=getattr(settings, "ARGON2_TIME_COST", 3),
+            memory_cost=getattr(settings, "ARGON2_MEMORY_COST", 65536),
+            parallelism=getattr(settings, "ARGON2_PARALLELISM", 1),
+        ),
+        "scrypt": ScryptHasher(
+            n=getattr(settings, "SCRYPT_N", 2 ** 15),
+            r=getattr(settings, "SCRYPT_R", 8),
+            p=getattr(settings, "SCRYPT_P", 1),
+        ),
+    }
+
+
+HASHERS = build_hashers()
+
+
+def get_default_hasher() -> BasePasswordHasher:
+    return HASHERS[getattr(settings, "PASSWORD_HASHER", "bcrypt")]
+
+
+def identify_hasher(encoded: str) -> BasePasswordHasher | None:
+    """Хэшер по префиксу сохранённого хэша; None — строка не похожа на хэш."""
+    for hasher in HASHERS.values():
+        if hasher.identifies(encoded):
+            return hasher
+    return None
+
+
+def make_password(raw_password: str) -> str:
+    return get_default_hasher().encode(raw_password)
+
+
+def verify_password(raw_password: str, encoded: str) -> tuple[bool, bool]:
+    """
+    Проверка пароля. Возвращает (совпал, нужно_перехэшировать):
+    перехэширование нужно, если алгоритм или стоимость отличаются от текущих.
+    """
+    hasher = identify_hasher(encoded)
+    if hasher is None or not hasher.verify(raw_password, encoded):
+        return False, False
+    default = get_default_hasher()
+    return True, hasher is not default or default.must_update(encoded)
@@ -0,0 +1,149 @@
+"""
+Ограниченный пул для bcrypt (логин, регистрация, смена пароля, создание пользователей).
+
+bcrypt отпускает GIL, поэтому хэши считаются в отдельных потоках, а число
+одновременных хэширований ограничено PASSWORD_HASHING_WORKERS. Сверх этого
+в очереди может ждать не больше PASSWORD_HASHING_QUEUE задач — остальные
+сразу получают 503 с Retry-After, а не копятся, занимая потоки веб-сервера.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    """Очередь хэширования переполнена. DRF добавит Retry-After по атрибуту wait."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Сервис перегружен, повторите попытку позже."
+    default_code = "password_hashing_busy"
+
+    def __init__(self, wait: int, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class HashingPool:
+    """Пул потоков с ограниченной очередью и метриками ожидания/времени хэширования."""
+
+    def __init__(self, workers: int = 4, queue_depth: int = 32, retry_after: int = 1):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + queue_depth) if workers > 0 else None
+        self._lock = threading.Lock()
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "queue_wait_total_ms": 0.0,
+            "queue_wait_max_ms": 0.0,
+            "hash_time_total_ms": 0.0,
+            "hash_time_max_ms": 0.0,
+        }
+
+    def run(self, fn, *args):
+        """Выполняет fn(*args) в пуле и ждёт результат; при переполнении — PasswordHashingBusy."""
+        if self._slots is None:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(0.0, time.perf_counter() - started)
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordHashingBusy(wait=self.retry_after)
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self._stats["in_flight"] += 1
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        try:
+            return self._get_executor().submit(task).result()
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            self._slots.release()
+
+    def map(self, fn, items) -> list:
+        """
+        Пакетное хэширование (массовое создание пользователей): fn(item) для
+        каждого элемента параллельно. Пакет занимает не больше workers мест
+        и ждёт их освобождения, а не получает 503, — остаток очереди
+        остаётся одиночным запросам (логин, регистрация).
+        """
+        items = list(items)
+        if self._slots is None or len(items) < 2:
+            return [self.run(fn, item) for item in items]
+
+        batch_slots = threading.BoundedSemaphore(self.workers)
+
+        def task(item, submitted):
+            started = time.perf_counter()
+            try:
+                return fn(item)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+                with self._lock:
+                    self._stats["in_flight"] -= 1
+                self._slots.release()
+                batch_slots.release()
+
+        futures = []
+        for item in items:
+            batch_slots.acquire()
+            self._slots.acquire()
+            with self._lock:
+                self._stats["in_flight"] += 1
+            futures.append(self._get_executor().submit(task, item, time.perf_counter()))
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats["completed"] or 1
+        stats["queue_wait_avg_ms"] = stats["queue_wait_total_ms"] / completed
+        stats["hash_time_avg_ms"] = stats["hash_time_total_ms"] / completed
+        for name, value in stats.items():
+            if isinstance(value, float):
+                stats[name] = round(value, 3)
+        stats.update(workers=self.workers, queue_depth=self.queue_depth)
+        return stats
+
+    def _record(self, queue_wait: float, hash_time: float):
+        queue_wait_ms, hash_time_ms = queue_wait * 1000, hash_time * 1000
+        with self._lock:
+            s = self._stats
+            s["completed"] += 1
+            s["queue_wait_total_ms"] += queue_wait_ms
+            s["queue_wait_max_ms"] = max(s["queue_wait_max_ms"], queue_wait_ms)
+            s["hash_time_total_ms"] += hash_time_ms
+            s["hash_time_max_ms"] = max(s["hash_time_max_ms"], hash_time_ms)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+
+hashing_pool = HashingPool(
+    workers=getattr(settings, "PASSWORD_HASHING_WORKERS", 4),
+    queue_depth=getattr(settings, "PASSWORD_HASHING_QUEUE", 32),
+    retry_after=getattr(settings, "PASSWORD_HASHING_RETRY_AFTER", 1),
+)
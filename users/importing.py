@@ -0,0 +1,167 @@
+"""
+Потоковый импорт пользователей (management-команда import_users).
+
+Вход — CSV с заголовком или JSONL, поля:
+  email, first_name, last_name, middle_name, role (имя роли), is_active,
+  password (открытый пароль) или password_hash (готовый хэш bcrypt/argon2id/scrypt).
+
+Записи читаются по одной, копятся в пакеты и вставляются upsert'ом по email:
+  • PostgreSQL — COPY во временную таблицу и INSERT ... ON CONFLICT;
+  • остальные БД — bulk_create(update_conflicts=True).
+У существующих пользователей увеличивается token_version: после смены
+пароля при миграции старые токены недействительны.
+"""
+
+import csv
+import io
+import json
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from users.hashers import identify_hasher
+from users.models import User
+
+UPSERT_FIELDS = ("first_name", "last_name", "middle_name", "password", "is_active", "role_id")
+BOOLEAN_VALUES = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def iter_records(stream, fmt: str, start_offset: int = 0):
+    """
+    Записи файла по одной: (запись, смещение в байтах после записи).
+    Запись CSV — dict, JSONL — строка (разбирает parse_record, чтобы битая
+    строка стала ошибкой записи, а не остановкой импорта).
+    stream — бинарный файл; смещение позволяет продолжить импорт после сбоя.
+    Для потоков без позиционирования (stdin, pipe) смещение — None.
+    """
+    seekable = stream.seekable()
+    if start_offset and not seekable:
+        raise ValueError("продолжение со смещения невозможно: поток не поддерживает seek")
+    if fmt == "csv":
+        header = next(csv.reader([stream.readline().decode("utf-8-sig")]))
+        if start_offset:
+            stream.seek(start_offset)
+        lines = (raw.decode("utf-8") for raw in stream)
+        for row in csv.DictReader(lines, fieldnames=header):
+            yield row, stream.tell() if seekable else None
+    else:
+        if start_offset:
+            stream.seek(start_offset)
+        for raw in stream:
+            if raw.strip():
+                yield raw.decode("utf-8"), stream.tell() if seekable else None
+
+
+def parse_record(record, roles: dict[str, int], default_role_id) -> dict:
+    """Нормализует запись (dict или строку JSON); ошибки — ImportRowError."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as exc:
+            raise ImportRowError(f"некорректный JSON: {exc}")
+        if not isinstance(record, dict):
+            raise ImportRowError("ожидается JSON-объект")
+    email = (record.get("email") or "").strip().lower()
+    if "@" not in email:
+        raise ImportRowError(f"некорректный email: {email!r}")
+
+    role_name = (record.get("role") or "").strip()
+    if role_name:
+        if role_name not in roles:
+            raise ImportRowError(f"неизвестная роль: {role_name!r}")
+        role_id = roles[role_name]
+    else:
+        role_id = default_role_id
+
+    is_active = record.get("is_active", True)
+    if isinstance(is_active, str):
+        if is_active.strip().lower() not in BOOLEAN_VALUES:
+            raise ImportRowError(f"is_active: {is_active!r}")
+        is_active = BOOLEAN_VALUES[is_active.strip().lower()]
+
+    password_hash = (record.get("password_hash") or "").strip()
+    password = record.get("password") or ""
+    if password_hash:
+        if identify_hasher(password_hash) is None:
+            raise ImportRowError("password_hash: неизвестный формат хэша")
+    elif not password:
+        raise ImportRowError("нет password или password_hash")
+
+    return {
+        "email": email,
+        "first_name": (record.get("first_name") or "").strip(),
+        "last_name": (record.get("last_name") or "").strip() or None,
+        "middle_name": (record.get("middle_name") or "").strip() or None,
+        "password": password_hash or None,
+        "raw_password": None if password_hash else password,
+        "is_active": bool(is_active),
+        "role_id": role_id,
+    }
+
+
+def upsert_users(rows: list[dict]) -> tuple[int, int]:
+    """
+    Upsert пакета по email (вызывать внутри transaction.atomic).
+    Возвращает (создано, обновлено).
+    """
+    # В одном INSERT ... ON CONFLICT email не может повторяться — берём последнюю запись
+    rows = list({row["email"]: row for row in rows}.values())
+    if connection.vendor == "postgresql":
+        return _copy_upsert(rows)
+
+    emails = [row["email"] for row in rows]
+    existing = set(User.objects.filter(email__in=emails).values_list("email", flat=True))
+    User.objects.bulk_create(
+        [User(email=row["email"], **{field: row[field] for field in UPSERT_FIELDS}) for row in rows],
+        update_conflicts=True,
+        unique_fields=["email"],
+        update_fields=[*(field.removesuffix("_id") for field in UPSERT_FIELDS), "updated_at"],
+    )
+    if existing:
+        User.objects.filter(email__in=existing).update(token_version=F("token_version") + 1)
+    return len(rows) - len(existing), len(existing)
+
+
+_COPY_COLUMNS = ("email", *UPSERT_FIELDS)
+
+
+def _copy_upsert(rows: list[dict]) -> tuple[int, int]:
+    table = User._meta.db_table
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in _COPY_COLUMNS])
+    buffer.seek(0)
+
+    now = timezone.now()
+    columns = ", ".join(_COPY_COLUMNS)
+    updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in UPSERT_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS import_users ("
+            "email text, first_name text, last_name text, middle_name text, "
+            "password text, is_active boolean, role_id bigint) ON COMMIT DELETE ROWS"
+        )
+        copy_sql = f"COPY import_users ({columns}) FROM STDIN WITH (FORMAT csv)"
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(copy_sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, token_version, created_at, updated_at) "
+            f"SELECT email, COALESCE(first_name, ''), last_name, middle_name, password, "
+            f"is_active, role_id, 0, %s, %s FROM import_users "
+            f"ON CONFLICT (email) DO UPDATE SET {updates}, "
+            f"token_version = {table}.token_version + 1, updated_at = EXCLUDED.updated_at "
+            f"RETURNING (xmax = 0)",
+            [now, now],
+        )
+        inserted = sum(1 for (was_inserted,) in cursor.fetchall() if was_inserted)
+    return inserted, len(rows) - inserted
@@ -0,0 +1,108 @@
+"""
+Асимметричные ключи подписи JWT (EdDSA / ES256) с идентификаторами kid.
+
+Ключи лежат в каталоге JWT_KEYS_DIR:
+  • <kid>.pem      — закрытый ключ (может подписывать и проверять);
+  • <kid>.pub.pem  — только открытый ключ (выведенный из ротации, только проверка).
+
+Подписывает ключ JWT_ACTIVE_KID (по умолчанию — последний по имени закрытый ключ).
+Все ключи публикуются в JWKS, чтобы другие сервисы проверяли токены локально.
+Если каталог не задан — используется прежняя схема HS256 с SECRET_KEY.
+"""
+
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from jwt.algorithms import get_default_algorithms
+
+PRIVATE_SUFFIX = ".pem"
+PUBLIC_SUFFIX = ".pub.pem"
+
+
+def algorithm_for_key(key) -> str:
+    """EdDSA для Ed25519, ES256 для EC P-256; другие ключи не поддерживаются."""
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name == "secp256r1":
+        return "ES256"
+    raise ValueError(f"Неподдерживаемый тип ключа: {type(key).__name__}")
+
+
+class KeyRing:
+    """Набор ключей подписи, загружаемый из каталога один раз на процесс."""
+
+    def __init__(self, keys_dir: str = "", active_kid: str = ""):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._private = {}  # kid -> (alg, private_key)
+        self._public = {}  # kid -> (alg, public_key)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.keys_dir)
+
+    def signing_key(self):
+        """(kid, alg, private_key) активного ключа."""
+        self._load()
+        kid = self.active_kid or (max(self._private) if self._private else "")
+        if kid not in self._private:
+            raise RuntimeError(f"Активный ключ подписи JWT '{kid}' не найден в {self.keys_dir}")
+        alg, key = self._private[kid]
+        return kid, alg, key
+
+    def verification_key(self, kid: str):
+        """(alg, public_key) по kid или None."""
+        self._load()
+        return self._public.get(kid)
+
+    def jwks(self) -> dict:
+        self._load()
+        algorithms = get_default_algorithms()
+        keys = []
+        for kid in sorted(self._public):
+            alg, key = self._public[kid]
+            jwk = algorithms[alg].to_jwk(key, as_dict=True)
+            jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def reload(self):
+        with self._lock:
+            self._loaded = False
+        self._load()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            from cryptography.hazmat.primitives.serialization import (
+                load_pem_private_key, load_pem_public_key)
+
+            private, public = {}, {}
+            for path in sorted(Path(self.keys_dir).glob(f"*{PRIVATE_SUFFIX}")):
+                data = path.read_bytes()
+                if path.name.endswith(PUBLIC_SUFFIX):
+                    kid = path.name[:-len(PUBLIC_SUFFIX)]
+                    key = load_pem_public_key(data)
+                    public[kid] = (algorithm_for_key(key), key)
+                else:
+                    kid = path.name[:-len(PRIVATE_SUFFIX)]
+                    key = load_pem_private_key(data, password=None)
+                    alg = algorithm_for_key(key)
+                    private[kid] = (alg, key)
+                    public[kid] = (alg, key.public_key())
+            self._private, self._public = private, public
+            self._loaded = True
+
+
+keyring = KeyRing(
+    keys_dir=getattr(settings, "JWT_KEYS_DIR", ""),
+    active_kid=getattr(settings, "JWT_ACTIVE_KID", ""),
+)
@@ -0,0 +1,309 @@
+"""
+Воспроизведение нагрузки (management-команда replay_load).
+
+Источник событий:
+  • трасса JSONL от RequestTraceMiddleware — межзапросные интервалы сохраняются
+    (с множителем скорости) или заменяются фиксированной частотой;
+  • сценарий JSON — смесь эндпоинтов с весами, частота и длительность:
+        {"rate": 200, "duration": 60, "seed": 1,
+         "mix": [{"method": "GET", "endpoint": "api/users/profile/", "weight": 70},
+                 {"method": "POST", "endpoint": "api/users/login/", "weight": 5}, ...]}
+
+Запросы отправляются по расписанию (open loop) через пул keep-alive
+соединений на asyncio-потоках; задержка считается от запланированного
+момента отправки, так что перегрузка сервера не прячется за ожиданием
+свободного соединения. Субъекты трассы отображаются на учётные записи
+нагрузочного набора (generate_load_dataset).
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from users.benchmarking import percentile
+
+LOGIN_ENDPOINT = "api/users/login/"
+REFRESH_ENDPOINT = "api/users/token/refresh/"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+_ROUTE_PARAM = re.compile(r"<(?:\w+:)?(\w+)>")
+
+
+@dataclass
+class Event:
+    at: float  # секунды от начала воспроизведения
+    method: str
+    endpoint: str
+    account: int
+    body: dict | None = None
+
+
+@dataclass
+class Stats:
+    latencies: list = field(default_factory=list)
+    ok: int = 0
+    client_errors: int = 0
+    server_errors: int = 0
+    failures: int = 0  # ошибки соединения и таймауты
+
+
+def load_trace(path: str, accounts: int, *, speed: float = 1.0, rate: float | None = None) -> list[Event]:
+    """События из трассы RequestTraceMiddleware."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("endpoint") is not None:
+                    records.append(record)
+    records.sort(key=lambda record: record["t"])
+    if not records:
+        return []
+
+    t0 = records[0]["t"]
+    events = []
+    for index, record in enumerate(records):
+        principal = record.get("principal")
+        account = int(principal, 16) % accounts if principal else index % accounts
+        at = index / rate if rate else (record["t"] - t0) / speed
+        events.append(Event(at, record["method"], record["endpoint"], account))
+    return events
+
+
+def load_scenario(path: str, accounts: int, *, rate: float | None = None) -> list[Event]:
+    """События синтетического сценария (детерминированно по seed)."""
+    with open(path, encoding="utf-8") as f:
+        scenario = json.load(f)
+    rng = random.Random(scenario.get("seed", 0))
+    rate = rate or scenario.get("rate", 50)
+    mix = scenario["mix"]
+    weights = [item.get("weight", 1) for item in mix]
+
+    events, at = [], 0.0
+    while at < scenario.get("duration", 60):
+        item = rng.choices(mix, weights)[0]
+        events.append(Event(at, item["method"].upper(), item["endpoint"], rng.randrange(accounts), item.get("body")))
+        at += rng.expovariate(rate)  # пуассоновский поток
+    return events
+
+
+class HttpConnection:
+    """Минимальный HTTP/1.1-клиент с keep-alive поверх asyncio-потоков."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"") -> tuple[int, bytes]:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        reused = self.writer is not None
+        try:
+            return await self._exchange(raw)
+        except ConnectionError:
+            if not reused:
+                raise
+            # Сервер закрыл простаивавшее keep-alive соединение — одна повторная попытка
+            return await self._exchange(raw)
+
+    async def _exchange(self, raw: bytes) -> tuple[int, bytes]:
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(raw)
+            return await asyncio.wait_for(self._read_response(), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _read_response(self) -> tuple[int, bytes]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("соединение закрыто сервером")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            payload = await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Replayer:
+    def __init__(self, base_url: str, *, concurrency: int = 50, timeout: float = 30.0,
+                 email_pattern: str = "load{:07d}@load.test", password: str = "Load123",
+                 allow_writes: bool = False):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.email_pattern = email_pattern
+        self.password = password
+        self.allow_writes = allow_writes
+        self.sessions = {}  # account -> {"access", "refresh", "id"}
+        self.stats = {}
+        self.skipped = 0
+
+    def run(self, events: list[Event]) -> dict:
+        return asyncio.run(self._run(events))
+
+    async def _run(self, events):
+        self._pool = asyncio.Queue()
+        for _ in range(self.concurrency):
+            self._pool.put_nowait(HttpConnection(self.host, self.port, self.timeout))
+
+        # Вход всех задействованных учётных записей — до начала замера
+        accounts = sorted({event.account for event in events})
+        await asyncio.gather(*(self._initial_login(account) for account in accounts))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+        for event in events:
+            delay = started + event.at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._fire(event, started + event.at)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        return self._report(elapsed)
+
+    async def _send(self, method, path, body=None, token=None):
+        headers = {"Accept": "application/json"}
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        connection = await self._pool.get()
+        try:
+            return await connection.request(method, path, headers, payload)
+        finally:
+            self._pool.put_nowait(connection)
+
+    async def _login(self, account):
+        credentials = {"email": self.email_pattern.format(account), "password": self.password}
+        status, payload = await self._send("POST", "/" + LOGIN_ENDPOINT, credentials)
+        if status == 200:
+            data = json.loads(payload)
+            self.sessions[account] = {
+                "access": data["access_token"], "refresh": data.get("refresh_token"), "id": data["user"]["id"],
+            }
+        return status, payload
+
+    async def _initial_login(self, account, attempts: int = 5):
+        for attempt in range(attempts):
+            try:
+                status, _ = await self._login(account)
+            except (OSError, asyncio.TimeoutError):
+                status = None
+            if status != 503 and status is not None:
+                return
+            await asyncio.sleep(0.2 * (attempt + 1))  # пул хэширования сервера переполнен
+
+    def _prepare(self, event):
+        """(path, body, token) или None, если событие нельзя безопасно воспроизвести."""
+        session = self.sessions.get(event.account)
+        if session is None:
+            return None
+        # Параметры маршрута — id самого субъекта (свой объект доступен при любой роли)
+        path = "/" + _ROUTE_PARAM.sub(lambda m: str(session["id"]), event.endpoint)
+        body = event.body
+        if event.endpoint == REFRESH_ENDPOINT:
+            body = {"refresh_token": session["refresh"]}
+        elif event.method not in READ_METHODS and body is None:
+            if not self.allow_writes:
+                return None
+            body = {}
+        return path, body, session["access"]
+
+    async def _fire(self, event, intended):
+        key = f"{event.method} {event.endpoint}"
+        loop = asyncio.get_running_loop()
+        try:
+            if event.endpoint == LOGIN_ENDPOINT:
+                status, _ = await self._login(event.account)
+            else:
+                prepared = self._prepare(event)
+                if prepared is None:
+                    self.skipped += 1
+                    return
+                path, body, token = prepared
+                status, payload = await self._send(event.method, path, body, token)
+                if event.endpoint == REFRESH_ENDPOINT and status == 200:
+                    data = json.loads(payload)
+                    self.sessions[event.account].update(access=data["access_token"], refresh=data["refresh_token"])
+        except (OSError, asyncio.TimeoutError, ValueError):
+            self.stats.setdefault(key, Stats()).failures += 1
+            return
+
+        stats = self.stats.setdefault(key, Stats())
+        stats.latencies.append(loop.time() - intended)
+        if status < 400:
+            stats.ok += 1
+        elif status < 500:
+            stats.client_errors += 1
+        else:
+            stats.server_errors += 1
+
+    def _report(self, elapsed: float) -> dict:
+        endpoints, total = {}, 0
+        for key, stats in sorted(self.stats.items()):
+            latencies = sorted(stats.latencies)
+            count = len(latencies) + stats.failures
+            total += count
+            errors = stats.server_errors + stats.failures
+            endpoints[key] = {
+                "count": count,
+                "ok": stats.ok,
+                "client_errors": stats.client_errors,
+                "server_errors": stats.server_errors,
+                "failures": stats.failures,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "skipped": self.skipped,
+            "endpoints": endpoints,
+        }
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from users.benchmarking import format_result, measure
+from users.cache import TokenCache, principal_cache
+from users.middleware import JWTUserMiddleware
+from users.models import User
+from users import utils
+
+
+class Command(BaseCommand):
+    help = "Замер накладных расходов аутентификации: decode_jwt_token и middleware без/с кэшем токенов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default="admin@test.com", help="Пользователь, для которого выпускается токен")
+        parser.add_argument("--iterations", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options["email"]).first()
+        if not user:
+            self.stderr.write(self.style.ERROR(f"Пользователь {options['email']} не найден."))
+            return
+
+        token = utils.create_jwt_token(user)
+        request = RequestFactory().get("/api/users/profile/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        middleware = JWTUserMiddleware(lambda r: None)
+        iterations = options["iterations"]
+
+        original_cache = utils.token_cache
+        try:
+            for label, cache in (("без кэша токенов", TokenCache(0)), ("с кэшем токенов", TokenCache(1024))):
+                utils.token_cache = cache
+                self.stdout.write(format_result(
+                    f"decode_jwt_token ({label})",
+                    measure(lambda: utils.decode_jwt_token(token), iterations=iterations),
+                ))
+                self.stdout.write(format_result(
+                    f"middleware ({label})",
+                    measure(lambda: middleware.process_request(request), iterations=iterations),
+                ))
+        finally:
+            utils.token_cache = original_cache
+
+        self.stdout.write(f"principal_cache: {principal_cache.stats()}")
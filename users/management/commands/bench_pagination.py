@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from users.benchmarking import format_result, measure
+from users.models import User
+from users.views_admin import USER_LIST_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Последняя страница списка пользователей: OFFSET/LIMIT против keyset (WHERE id > ... LIMIT)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        size = options["page_size"]
+        iterations = options["iterations"]
+        qs = User.objects.order_by("id").values(*USER_LIST_FIELDS)
+
+        total = qs.count()
+        if total <= size:
+            self.stdout.write(self.style.WARNING(
+                f"Пользователей {total} — меньше одной страницы, сравнение не покажет разницы."
+            ))
+        offset = max(total - size, 0)
+        # Позиция, которую клиент получил бы в курсоре предыдущей страницы
+        boundary = User.objects.order_by("id").values_list("id", flat=True)[offset - 1] if offset else 0
+
+        self.stdout.write(f"Пользователей: {total}, страница: {size}, OFFSET последней страницы: {offset}")
+        self.stdout.write(format_result(
+            "offset (OFFSET/LIMIT)",
+            measure(lambda: list(qs[offset:offset + size]), iterations=iterations, warmup=5),
+        ))
+        self.stdout.write(format_result(
+            "keyset (id > cursor LIMIT)",
+            measure(lambda: list(qs.filter(id__gt=boundary)[:size]), iterations=iterations, warmup=5),
+        ))
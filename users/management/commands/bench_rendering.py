@@ -0,0 +1,64 @@
+import io
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONParser, FastJSONRenderer, orjson
+from users.benchmarking import format_result, measure
+from users.models import User
+from users.views_admin import USER_LIST_FIELDS, USER_ROW
+
+
+class _UserListSerializer(serializers.ModelSerializer):
+    role_id = serializers.IntegerField(allow_null=True)
+
+    class Meta:
+        model = User
+        fields = USER_LIST_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Сериализация и рендеринг списка пользователей: ModelSerializer и модели против "
+        "RowSerializer над кортежами values_list(); JSONRenderer/JSONParser DRF против быстрых."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, iterations = options["rows"], options["iterations"]
+        qs = User.objects.order_by("id")[:rows]
+        total = len(USER_ROW.values_list(qs))
+        if total < rows:
+            self.stdout.write(self.style.WARNING(
+                f"Пользователей {total} < {rows}; пополните набор: generate_load_dataset --users {rows}."
+            ))
+        self.stdout.write(f"Строк: {total}, JSON: {'orjson' if orjson else 'stdlib json'}")
+
+        instances = list(qs)
+        tuples = list(USER_ROW.values_list(qs))
+        data = USER_ROW.many(tuples)
+        body = JSONRenderer().render(data)
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        drf_parser, fast_parser = JSONParser(), FastJSONParser()
+
+        cases = (
+            # Только Python: строки уже в памяти
+            ("serialize ModelSerializer", lambda: _UserListSerializer(instances, many=True).data),
+            ("serialize RowSerializer", lambda: USER_ROW.many(tuples)),
+            ("render JSONRenderer", lambda: drf_renderer.render(data)),
+            ("render FastJSONRenderer", lambda: fast_renderer.render(data)),
+            ("parse JSONParser", lambda: drf_parser.parse(io.BytesIO(body))),
+            ("parse FastJSONParser", lambda: fast_parser.parse(io.BytesIO(body))),
+            # Целиком: запрос, сериализация, рендеринг
+            ("total models+ModelSerializer+DRF",
+             lambda: drf_renderer.render(_UserListSerializer(qs.all(), many=True).data)),
+            ("total values_list+RowSerializer+fast",
+             lambda: fast_renderer.render(USER_ROW.many(USER_ROW.values_list(qs)))),
+        )
+        for name, fn in cases:
+            self.stdout.write(format_result(name, measure(fn, iterations=iterations, warmup=2)))
@@ -0,0 +1,146 @@
+import io
+import json
+import platform
+import time
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory
+
+from core.mixins import AccessControlMixin
+from core.permissions import check_permission
+from core.policy import get_policy_snapshot
+from users.benchmarking import format_result, measure
+from users.hashers import make_password
+from users.middleware import JWTUserMiddleware
+from users.models import User
+from users.throttling import login_throttle
+from users.utils import create_jwt_token, decode_jwt_token
+
+BENCH_EMAIL = "bench-admin@bench.test"
+BENCH_PASSWORD = "Bench123"
+
+
+class _UsersElement(AccessControlMixin):
+    element_name = "users"
+    owner_field = "id"
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарки горячих путей аутентификации и RBAC на нескольких размерах данных. "
+        "Результаты — JSON; сравнение с базовым прогоном и ошибка при регрессии."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="",
+                            help="Размеры набора через запятую (generate_load_dataset --reset); "
+                                 "пусто — текущие данные")
+        parser.add_argument("--elements", type=int, default=100)
+        parser.add_argument("--iterations", type=int, default=2000, help="Для быстрых путей")
+        parser.add_argument("--view-iterations", type=int, default=300, help="Для вью через тестовый клиент")
+        parser.add_argument("--login-iterations", type=int, default=10, help="Для LoginView (хэш пароля)")
+        parser.add_argument("--output", help="Сохранить результаты в JSON")
+        parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Допустимое падение ops/s относительно базового (0.2 = 20%%)")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "vendor": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+            },
+            "results": {},
+        }
+
+        # Лимит попыток входа не должен мешать замеру LoginView
+        limits = (login_throttle.email_limit, login_throttle.ip_limit)
+        login_throttle.email_limit = login_throttle.ip_limit = 0
+        try:
+            for size in sizes or [None]:
+                if size is not None:
+                    call_command("generate_load_dataset", users=size, elements=options["elements"],
+                                 hashes=1, reset=True, stdout=io.StringIO())
+                # Ключ для сравнения с базовым прогоном — запрошенный размер
+                label = str(size) if size is not None else "current"
+                self.stdout.write(f"--- {label}: пользователей в БД {User.objects.count()}")
+                report["results"][label] = self._run(options)
+        finally:
+            login_throttle.email_limit, login_throttle.ip_limit = limits
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Результаты: {options['output']}")
+        if options["baseline"]:
+            self._compare(report, options["baseline"], options["threshold"])
+
+    def _run(self, options) -> dict:
+        admin_role = get_policy_snapshot().role_by_name("admin")
+        if admin_role is None:
+            raise CommandError("Нет роли admin — загрузите фикстуры RBAC.")
+        user, _ = User.objects.update_or_create(
+            email=BENCH_EMAIL,
+            defaults={"first_name": "Bench", "role": admin_role, "is_active": True,
+                      "password": make_password(BENCH_PASSWORD)},
+        )
+
+        token = create_jwt_token(user)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        middleware = JWTUserMiddleware(lambda r: None)
+        request = RequestFactory().get("/api/users/profile/", **auth)
+        middleware.process_request(request)
+        element = _UsersElement()
+        client = Client()
+        login_body = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+
+        fast, views = options["iterations"], options["view_iterations"]
+        cases = (
+            ("decode_jwt_token", lambda: decode_jwt_token(token), fast),
+            ("JWTUserMiddleware.process_request", lambda: middleware.process_request(request), fast),
+            ("check_permission", lambda: check_permission(user, "users", "read"), fast),
+            ("check_read_scope", lambda: element.check_read_scope(request), fast),
+            ("ProfileView", lambda: client.get("/api/users/profile/", **auth), views),
+            ("AdminUserListCreateView", lambda: client.get("/api/admin/users/", **auth), views),
+            # Последним: вход увеличивает token_version, и token выше перестаёт действовать
+            ("LoginView", lambda: client.post("/api/users/login/", login_body, content_type="application/json"),
+             options["login_iterations"]),
+        )
+
+        results = {}
+        for name, fn, iterations in cases:
+            results[name] = measure(fn, iterations=iterations, warmup=min(50, iterations))
+            self.stdout.write(format_result(name, results[name]))
+        return results
+
+    def _compare(self, report, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for size, cases in report["results"].items():
+            base_cases = baseline.get("results", {}).get(size)
+            if base_cases is None:
+                self.stdout.write(self.style.WARNING(f"В базовом прогоне нет размера {size} — пропуск."))
+                continue
+            for name, result in cases.items():
+                base = base_cases.get(name)
+                if base is None:
+                    continue
+                change = result["ops_per_sec"] / base["ops_per_sec"] - 1 if base["ops_per_sec"] else 0.0
+                line = f"{size:>9} {name:<36} {change:+7.1%}  q/call {base['queries_per_call']:.2f} -> {result['queries_per_call']:.2f}"
+                if change < -threshold or result["queries_per_call"] > base["queries_per_call"] + 0.01:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"Регрессий: {len(regressions)} (порог {threshold:.0%} по ops/s, рост запросов).")
+        self.stdout.write(self.style.SUCCESS("Регрессий нет."))
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.bus import build_bus
+from users.benchmarking import percentile
+
+TOPIC = "bus_staleness"
+
+
+class Command(BaseCommand):
+    help = (
+        "Задержка доставки шины инвалидации: один экземпляр шины публикует событие, "
+        "второй (как другой воркер) получает его через БД или LISTEN/NOTIFY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", choices=("polling", "pgnotify"), default="polling")
+        parser.add_argument("--samples", type=int, default=10)
+        parser.add_argument("--keyed", action="store_true", help="Точечные события (с ключом), а не версии топика")
+        parser.add_argument("--timeout", type=float, default=10.0, help="Предельное ожидание одного события, сек")
+
+    def handle(self, *args, **options):
+        publisher = build_bus(options["backend"])
+        subscriber = build_bus(options["backend"])
+        delivered = threading.Event()
+        subscriber.subscribe(TOPIC, lambda topic, key, version: delivered.set())
+        subscriber.start()
+        publisher.start()  # polling: ключевые события пишет в журнал поток публикующей шины
+        # Даём подписчику снять начальные версии (опрос) или выполнить LISTEN
+        time.sleep(getattr(subscriber, "interval", 0.5) + 0.5)
+
+        delays, lost = [], 0
+        for _ in range(options["samples"]):
+            delivered.clear()
+            started = time.perf_counter()
+            publisher.publish(TOPIC, 1 if options["keyed"] else None)
+            if delivered.wait(options["timeout"]):
+                delays.append(time.perf_counter() - started)
+            else:
+                lost += 1
+
+        delays.sort()
+        self.stdout.write(
+            f"{options['backend']}: доставлено {len(delays)}/{options['samples']}, "
+            f"p50 {percentile(delays, 50) * 1000:.1f} мс, p99 {percentile(delays, 99) * 1000:.1f} мс, "
+            f"max {(delays[-1] if delays else 0) * 1000:.1f} мс"
+        )
+        if lost:
+            self.stderr.write(self.style.ERROR(f"Не доставлено за {options['timeout']} с: {lost}"))
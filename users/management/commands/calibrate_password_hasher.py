@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.hashers import Argon2idHasher, BCryptHasher, ScryptHasher, argon2
+
+SAMPLE_PASSWORD = "Calibrate123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Подбирает стоимость хэширования паролей на этом хосте: "
+        "максимальную, при которой проверка пароля укладывается в --target-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--algorithm", choices=("bcrypt", "argon2id", "scrypt"), default="bcrypt")
+        parser.add_argument("--target-ms", type=float, default=250.0,
+                            help="Целевое время одной проверки пароля, мс")
+        parser.add_argument("--samples", type=int, default=3, help="Замеров на каждую стоимость")
+
+    def handle(self, *args, **options):
+        algorithm = options["algorithm"]
+        target = options["target_ms"]
+        samples = options["samples"]
+
+        if algorithm == "bcrypt":
+            candidates = [(f"BCRYPT_ROUNDS={rounds}", BCryptHasher(rounds=rounds)) for rounds in range(8, 17)]
+        elif algorithm == "argon2id":
+            if argon2 is None:
+                raise CommandError("Для argon2id установите пакет argon2-cffi.")
+            candidates = [
+                (f"ARGON2_TIME_COST={t} ARGON2_MEMORY_COST=65536", Argon2idHasher(time_cost=t, memory_cost=65536))
+                for t in range(1, 11)
+            ]
+        else:
+            candidates = [(f"SCRYPT_N={2 ** k}", ScryptHasher(n=2 ** k)) for k in range(12, 21)]
+
+        best = None
+        for label, hasher in candidates:
+            encoded = hasher.encode(SAMPLE_PASSWORD)
+            timings = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                hasher.verify(SAMPLE_PASSWORD, encoded)
+                timings.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(timings)
+            self.stdout.write(f"{label:<45} {median:8.1f} мс")
+            if median > target:
+                break
+            best = label
+
+        if best is None:
+            self.stdout.write(self.style.WARNING(f"Даже минимальная стоимость дольше {target:.0f} мс."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Рекомендация для {target:.0f} мс: PASSWORD_HASHER={algorithm} {best}"
+        ))
@@ -0,0 +1,83 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.routers import PRIMARY_DB, replicas
+from users.benchmarking import count_queries
+from users.cache import principal_cache
+from users.throttling import login_throttle
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверка маршрутизации чтения в реплики и read-your-writes через тестовый клиент. "
+        "Для двух SQLite: скопируйте файл основной БД в файл реплики, объявите её в DATABASES "
+        "и DATABASE_REPLICAS, задайте общий кэш (например, FileBasedCache) и запустите команду — "
+        "реплика при этом отстаёт (не получает записей)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", default="admin@test.com", help="Учётная запись с ролью admin")
+        parser.add_argument("--password", default="Test123")
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError("DATABASE_REPLICAS пуст — маршрутизация выключена.")
+        window = getattr(settings, "READ_YOUR_WRITES_SECONDS", 5)
+        if window <= 0:
+            raise CommandError("READ_YOUR_WRITES_SECONDS должен быть больше 0.")
+
+        # Кэш пользователей скрыл бы чтения middleware, лимит входа — сам вход
+        cache_size, limits = principal_cache.max_size, (login_throttle.email_limit, login_throttle.ip_limit)
+        principal_cache.max_size = 0
+        login_throttle.email_limit = login_throttle.ip_limit = 0
+        try:
+            failures = self._run(options, aliases, window)
+        finally:
+            principal_cache.max_size = cache_size
+            login_throttle.email_limit, login_throttle.ip_limit = limits
+
+        if failures:
+            raise CommandError(f"Проверок не пройдено: {failures}.")
+        self.stdout.write(self.style.SUCCESS("Маршрутизация работает."))
+
+    def _run(self, options, aliases, window) -> int:
+        client = Client()
+        failures = 0
+
+        def step(name, fn, *, expect_status, primary, replica):
+            nonlocal failures
+            with ExitStack() as stack:
+                counters = {alias: stack.enter_context(count_queries(alias)) for alias in (PRIMARY_DB, *aliases)}
+                response = fn()
+            on_primary = counters[PRIMARY_DB].count
+            on_replicas = sum(counters[alias].count for alias in aliases)
+            ok = (response.status_code == expect_status
+                  and bool(on_primary) == primary and bool(on_replicas) == replica)
+            failures += not ok
+            line = f"{name:<46} {response.status_code}  основная {on_primary:>2}  реплики {on_replicas:>2}"
+            self.stdout.write(line if ok else self.style.ERROR(line))
+            return response
+
+        login = step(
+            "POST login (запись token_version)",
+            lambda: client.post("/api/users/login/", {"email": options["email"], "password": options["password"]},
+                                content_type="application/json"),
+            expect_status=200, primary=True, replica=False,
+        )
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {login.json()['access_token']}"}
+        step("GET profile сразу после входа (закреплён)", lambda: client.get("/api/users/profile/", **auth),
+             expect_status=200, primary=True, replica=False)
+
+        self.stdout.write(f"Ожидание окна закрепления ({window:g} с)...")
+        time.sleep(window + 0.5)
+        # Реплика отстала: token_version там старая — пользователь перечитывается из основной БД
+        step("GET profile после окна (реплика + основная)", lambda: client.get("/api/users/profile/", **auth),
+             expect_status=200, primary=True, replica=True)
+        step("GET rbac/roles/ (справочник из реплики)", lambda: client.get("/api/rbac/roles/", **auth),
+             expect_status=200, primary=True, replica=True)
+        return failures
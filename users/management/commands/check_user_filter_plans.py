@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from users.filters import filter_users
+from users.models import User
+
+# Фильтры списка пользователей, которые обязаны обслуживаться индексом
+CASES = (
+    ("role_id + is_active", "role_id=1&is_active=true"),
+    ("active + created range", "is_active=true&created_after=2024-01-01&created_before=2030-01-01"),
+    ("email", "q=admin"),
+)
+# Префиксный поиск индексируется только триграммами PostgreSQL
+POSTGRES_ONLY = {"email"}
+
+
+def _full_scan(plan: str) -> bool:
+    if connection.vendor == "postgresql":
+        return "Seq Scan on users_user" in plan
+    if connection.vendor == "sqlite":
+        return any(
+            line.strip().split(" ")[-1] == "users_user" and "SCAN" in line
+            for line in plan.splitlines()
+        )
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет планы запросов фильтров списка пользователей: ни один "
+        "не должен сводиться к полному сканированию users_user."
+    )
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, query in CASES:
+            if name in POSTGRES_ONLY and connection.vendor != "postgresql":
+                self.stdout.write(f"{name:<25} пропущено ({connection.vendor})")
+                continue
+            qs = filter_users(User.objects.order_by("id"), QueryDict(query)).values("id")
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    # На маленькой таблице планировщик выбрал бы Seq Scan и при наличии индекса
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = qs.explain()
+            scan = _full_scan(plan)
+            if scan:
+                failures.append(name)
+            self.stdout.write(f"{name:<25} {'FULL SCAN' if scan else 'index'}")
+            if options["verbosity"] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"Полное сканирование: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Все фильтры используют индексы."))
@@ -0,0 +1,59 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.keys import PRIVATE_SUFFIX, PUBLIC_SUFFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт новый ключ подписи JWT (EdDSA или ES256) в JWT_KEYS_DIR. "
+        "Для ротации: создать ключ, выставить JWT_ACTIVE_KID, а старый ключ "
+        "после истечения его токенов заменить на <kid>.pub.pem (--retire)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alg", choices=("EdDSA", "ES256"), default="EdDSA")
+        parser.add_argument("--kid", help="Идентификатор ключа (по умолчанию — дата и время)")
+        parser.add_argument("--retire", metavar="KID",
+                            help="Вывести ключ из подписи: оставить только открытую часть")
+
+    def handle(self, *args, **options):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+        keys_dir = getattr(settings, "JWT_KEYS_DIR", "")
+        if not keys_dir:
+            raise CommandError("JWT_KEYS_DIR не задан.")
+        keys_dir = Path(keys_dir)
+        keys_dir.mkdir(parents=True, exist_ok=True)
+
+        if options["retire"]:
+            kid = options["retire"]
+            private_path = keys_dir / f"{kid}{PRIVATE_SUFFIX}"
+            if not private_path.exists():
+                raise CommandError(f"Ключ {private_path} не найден.")
+            key = serialization.load_pem_private_key(private_path.read_bytes(), password=None)
+            (keys_dir / f"{kid}{PUBLIC_SUFFIX}").write_bytes(key.public_key().public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+            ))
+            private_path.unlink()
+            self.stdout.write(self.style.SUCCESS(f"Ключ {kid} выведен из подписи, открытая часть сохранена."))
+            return
+
+        kid = options["kid"] or datetime.now(UTC).strftime("%Y%m%d%H%M%S")
+        path = keys_dir / f"{kid}{PRIVATE_SUFFIX}"
+        if path.exists():
+            raise CommandError(f"Ключ {path} уже существует.")
+
+        if options["alg"] == "EdDSA":
+            key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            key = ec.generate_private_key(ec.SECP256R1())
+        path.write_bytes(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ))
+        path.chmod(0o600)
+        self.stdout.write(self.style.SUCCESS(f"Создан ключ {kid} ({options['alg']}): {path}"))
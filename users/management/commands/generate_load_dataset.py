@@ -0,0 +1,159 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.bus import bus
+from core.models import AccessRoleRule, BusinessElement, Role
+from core.policy import RULE_FLAGS, bump_policy_epoch
+from users.hashers import make_password
+from users.models import USER_TOPIC, RefreshToken, User
+
+EMAIL_DOMAIN = "load.test"
+FIRST_NAMES = ("Анна", "Иван", "Мария", "Пётр", "Ольга", "Сергей", "Елена", "Дмитрий", "Наталья", "Алексей")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов")
+
+# Вероятность каждого флага правила для роли: admin — всё, guest — почти ничего
+ROLE_PROFILES = {
+    "admin": dict.fromkeys((field for field, _ in RULE_FLAGS), 1.0),
+    "manager": {"read_permission": 1.0, "read_all_permission": 0.9, "create_permission": 0.8,
+                "update_permission": 1.0, "update_all_permission": 0.7, "delete_permission": 0.3,
+                "delete_all_permission": 0.0},
+    "user": {"read_permission": 0.9, "read_all_permission": 0.2, "create_permission": 0.4,
+             "update_permission": 0.6, "update_all_permission": 0.0, "delete_permission": 0.2,
+             "delete_all_permission": 0.0},
+    "guest": {"read_permission": 0.3, "read_all_permission": 0.1},
+}
+
+
+def _like(value: str) -> str:
+    """Значение для LIKE ... ESCAPE '\\' без подстановочных символов."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _reset_statements(prefix: str):
+    """DELETE сгенерированных строк: refresh-токены, правила, пользователи, элементы."""
+    qn = connection.ops.quote_name
+    tokens, rules = RefreshToken._meta, AccessRoleRule._meta
+    users, elements = User._meta, BusinessElement._meta
+    email = qn(users.get_field("email").column)
+    users_where = f"{email} LIKE %s ESCAPE '\\' AND {email} LIKE %s ESCAPE '\\'"
+    users_params = [f"{_like(prefix)}%", f"%@{_like(EMAIL_DOMAIN)}"]
+    elements_where = f"{qn(elements.get_field('name').column)} LIKE %s ESCAPE '\\'"
+    elements_params = [f"{_like(prefix + '_')}%"]
+    return (
+        (f"DELETE FROM {qn(tokens.db_table)} WHERE {qn(tokens.get_field('user').column)} IN "
+         f"(SELECT {qn(users.pk.column)} FROM {qn(users.db_table)} WHERE {users_where})", users_params),
+        (f"DELETE FROM {qn(rules.db_table)} WHERE {qn(rules.get_field('element').column)} IN "
+         f"(SELECT {qn(elements.pk.column)} FROM {qn(elements.db_table)} WHERE {elements_where})", elements_params),
+        (f"DELETE FROM {qn(users.db_table)} WHERE {users_where}", users_params),
+        (f"DELETE FROM {qn(elements.db_table)} WHERE {elements_where}", elements_params),
+    )
+
+
+def _parse_weights(value: str) -> dict[str, int]:
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition(":")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+class Command(BaseCommand):
+    help = (
+        "Детерминированный набор данных для нагрузочных тестов: N пользователей по ролям, "
+        "M бизнес-элементов и полная матрица правил (bulk_create, несколько готовых хэшей)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--elements", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--roles", default="admin:1,manager:5,user:90,guest:4",
+                            help="Роли и их доли среди пользователей")
+        parser.add_argument("--password", default="Load123", help="Пароль всех сгенерированных пользователей")
+        parser.add_argument("--hashes", type=int, default=4, help="Сколько разных хэшей посчитать заранее")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="load", help="Префикс email и имён элементов")
+        parser.add_argument("--reset", action="store_true", help="Удалить ранее сгенерированные данные с этим префиксом")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        weights = _parse_weights(options["roles"])
+        users_qs = User.objects.filter(email__startswith=prefix, email__endswith=f"@{EMAIL_DOMAIN}")
+        elements_qs = BusinessElement.objects.filter(name__startswith=f"{prefix}_")
+
+        if options["reset"]:
+            started = time.perf_counter()
+            # DELETE ... WHERE без загрузки строк в Python, каскада по одной записи и сигналов
+            # post_delete (каждое правило иначе сдвигало бы эпоху политики); зависимые строки
+            # удаляются первыми, сигналы заменяет одно оповещение в конце
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql, params in _reset_statements(prefix):
+                    cursor.execute(sql, params)
+            bump_policy_epoch()
+            bus.publish(USER_TOPIC)
+            self.stdout.write(f"Удалены прежние данные ({time.perf_counter() - started:.1f} с)")
+        elif users_qs.exists() or elements_qs.exists():
+            raise CommandError(f"Данные с префиксом '{prefix}' уже есть; используйте --reset.")
+
+        roles = {}
+        for name in weights:
+            roles[name], _ = Role.objects.get_or_create(name=name)
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            elements = BusinessElement.objects.bulk_create(
+                [BusinessElement(name=f"{prefix}_element_{i:04d}", description="Нагрузочный тест")
+                 for i in range(options["elements"])],
+                batch_size=options["batch_size"],
+            )
+            rules = [
+                AccessRoleRule(
+                    role=role, element=element,
+                    **{field: rng.random() < ROLE_PROFILES.get(name, {}).get(field, 0.0) for field, _ in RULE_FLAGS},
+                )
+                for name, role in roles.items()
+                for element in elements
+            ]
+            AccessRoleRule.objects.bulk_create(rules, batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Элементов {len(elements)}, правил {len(rules)} ({time.perf_counter() - started:.1f} с)"
+        )
+
+        # Хэш считается несколько раз (разные соли), а не на каждого пользователя
+        hashes = [make_password(options["password"]) for _ in range(max(1, options["hashes"]))]
+        role_names = list(weights)
+        role_weights = [weights[name] for name in role_names]
+
+        started, created = time.perf_counter(), 0
+        total, batch_size = options["users"], options["batch_size"]
+        for start in range(0, total, batch_size):
+            count = min(batch_size, total - start)
+            chosen = rng.choices(role_names, role_weights, k=count)
+            batch = [
+                User(
+                    email=f"{prefix}{start + i:07d}@{EMAIL_DOMAIN}",
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    password=hashes[(start + i) % len(hashes)],
+                    is_active=rng.random() >= 0.05,
+                    role=roles[chosen[i]],
+                )
+                for i in range(count)
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(batch)
+            created += count
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"пользователей {created:>10,} / {total:,}  {created / elapsed:>10,.0f} строк/с")
+
+        # bulk_create не вызывает сигналы — оповещаем кэши явно
+        bump_policy_epoch()
+        bus.publish(USER_TOPIC)
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {created} пользователей, {len(elements)} элементов, {len(rules)} правил "
+            f"(seed={options['seed']}, пароль {options['password']})."
+        ))
@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.bus import bus
+from core.policy import get_policy_snapshot
+from core.utils.roles import DEFAULT_USER_ROLE_NAME
+from users.hashers import make_password
+from users.importing import ImportRowError, iter_records, parse_record, upsert_users
+from users.models import USER_TOPIC
+
+
+def _init_worker():
+    # Для start method "spawn" настройки Django в дочернем процессе не инициализированы
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт пользователей из CSV/JSONL: готовые хэши или хэширование "
+        "паролей в пуле процессов, upsert пакетами по email, продолжение после сбоя."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл CSV или JSONL ('-' — stdin, без продолжения)")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="По умолчанию — по расширению файла")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Процессов для хэширования паролей (0 — в текущем процессе)")
+        parser.add_argument("--checkpoint", help="Файл контрольной точки (по умолчанию <path>.checkpoint)")
+        parser.add_argument("--restart", action="store_true", help="Игнорировать контрольную точку и начать сначала")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        batch_size = options["batch_size"]
+
+        snapshot = get_policy_snapshot()
+        roles = {name: role.id for name, role in snapshot.roles_by_name.items()}
+        default_role = snapshot.role_by_name(DEFAULT_USER_ROLE_NAME)
+        default_role_id = default_role.id if default_role else None
+
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        checkpoint_path = None if path == "-" else (options["checkpoint"] or f"{path}.checkpoint")
+        if not stream.seekable():
+            # stdin и pipe: позиции в потоке нет — продолжить после сбоя нельзя
+            checkpoint_path = None
+            self.stderr.write("Вход без seek (stdin/pipe): контрольные точки выключены, "
+                              "после сбоя импорт придётся начать заново.")
+        state = {"offset": 0, "rows": 0, "created": 0, "updated": 0, "errors": 0}
+        if checkpoint_path and os.path.exists(checkpoint_path) and not options["restart"]:
+            with open(checkpoint_path) as f:
+                state = json.load(f)
+            if state["offset"] > os.path.getsize(path):
+                raise CommandError("Контрольная точка не соответствует файлу; запустите с --restart.")
+            self.stdout.write(f"Продолжение с записи {state['rows']} (смещение {state['offset']}).")
+
+        pool, self.workers = None, options["workers"]
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker)
+
+        started, rows_at_start = time.perf_counter(), state["rows"]
+        try:
+            batch, offset = [], state["offset"]
+            for record, offset in iter_records(stream, fmt, state["offset"]):
+                state["rows"] += 1
+                try:
+                    batch.append(parse_record(record, roles, default_role_id))
+                except ImportRowError as exc:
+                    state["errors"] += 1
+                    self.stderr.write(f"запись {state['rows']}: {exc}")
+                if len(batch) >= batch_size:
+                    self._flush(batch, pool, state, offset, checkpoint_path, started, rows_at_start)
+                    batch = []
+            self._flush(batch, pool, state, offset, checkpoint_path, started, rows_at_start)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+            if pool:
+                pool.shutdown()
+
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        # Кэши пользователей во всех воркерах сбрасываются одним событием
+        bus.publish(USER_TOPIC)
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: записей {state['rows']}, создано {state['created']}, "
+            f"обновлено {state['updated']}, ошибок {state['errors']}."
+        ))
+
+    def _flush(self, batch, pool, state, offset, checkpoint_path, started, rows_at_start):
+        pending = [row for row in batch if row["raw_password"] is not None]
+        if pending:
+            passwords = [row["raw_password"] for row in pending]
+            if pool:
+                chunksize = max(1, len(passwords) // (self.workers * 4))
+                hashes = pool.map(make_password, passwords, chunksize=chunksize)
+            else:
+                hashes = map(make_password, passwords)
+            for row, password in zip(pending, hashes):
+                row["password"] = password
+
+        if batch:
+            with transaction.atomic():
+                created, updated = upsert_users(batch)
+            state["created"] += created
+            state["updated"] += updated
+
+        # Контрольная точка — только после коммита пакета
+        if checkpoint_path:
+            state["offset"] = offset
+            with open(f"{checkpoint_path}.tmp", "w") as f:
+                json.dump(state, f)
+            os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+
+        elapsed = time.perf_counter() - started
+        rate = (state["rows"] - rows_at_start) / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"записей {state['rows']:>10,}  создано {state['created']:>10,}  "
+            f"обновлено {state['updated']:>10,}  ошибок {state['errors']:>6,}  {rate:>10,.0f} записей/с"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from users.utils import prune_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истёкшие и отозванные refresh-токены. Запускается периодически "
+        "(cron, планировщик): при каждом входе и обмене токена добавляется строка."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Ширина диапазона id на одно удаление")
+
+    def handle(self, *args, **options):
+        deleted = prune_refresh_tokens(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено refresh-токенов: {deleted}."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users.models import User
+from users.token_table import token_table
+
+
+class Command(BaseCommand):
+    help = "Пересобирает общую таблицу версий токенов (JWT_TOKEN_TABLE_PATH) из БД."
+
+    def handle(self, *args, **options):
+        if not token_table.enabled:
+            self.stdout.write("JWT_TOKEN_TABLE_PATH не задан — таблица версий токенов отключена.")
+            return
+
+        rows = User.objects.values_list("id", "token_version", "is_active").iterator(chunk_size=5000)
+        count = token_table.rebuild(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Таблица версий токенов пересобрана: {count} пользователей ({token_table.path})."
+        ))
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.loadtest import Replayer, load_scenario, load_trace
+
+
+class Command(BaseCommand):
+    help = (
+        "Воспроизводит трассу запросов (JSONL от RequestTraceMiddleware) или сценарий (JSON) "
+        "против запущенного сервера; отчёт — пропускная способность, перцентили и ошибки по эндпоинтам."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Трасса *.jsonl или сценарий *.json")
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--rate", type=float, help="Запросов в секунду (вместо интервалов трассы/сценария)")
+        parser.add_argument("--speed", type=float, default=1.0, help="Ускорение трассы (2 — вдвое быстрее)")
+        parser.add_argument("--concurrency", type=int, default=50, help="Соединений keep-alive")
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--accounts", type=int, default=1000, help="Учётных записей нагрузочного набора")
+        parser.add_argument("--email-pattern", default="load{:07d}@load.test")
+        parser.add_argument("--password", default="Load123")
+        parser.add_argument("--allow-writes", action="store_true",
+                            help="Воспроизводить изменяющие запросы без тела из сценария (с пустым телом)")
+        parser.add_argument("--limit", type=int, help="Не больше N событий")
+        parser.add_argument("--output", help="Сохранить отчёт в JSON")
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        try:
+            if source.endswith(".jsonl"):
+                events = load_trace(source, options["accounts"], speed=options["speed"], rate=options["rate"])
+            else:
+                events = load_scenario(source, options["accounts"], rate=options["rate"])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Не удалось прочитать {source}: {exc}")
+        if options["limit"]:
+            events = events[:options["limit"]]
+        if not events:
+            raise CommandError("Нет событий для воспроизведения.")
+
+        self.stdout.write(f"Событий: {len(events)}, длительность по расписанию: {events[-1].at:.1f} с")
+        replayer = Replayer(
+            options["base_url"],
+            concurrency=options["concurrency"],
+            timeout=options["timeout"],
+            email_pattern=options["email_pattern"],
+            password=options["password"],
+            allow_writes=options["allow_writes"],
+        )
+        report = replayer.run(events)
+
+        self.stdout.write(
+            f"Запросов {report['requests']} за {report['elapsed_s']} с — {report['throughput_rps']} rps; "
+            f"пропущено {report['skipped']}"
+        )
+        for key, row in report["endpoints"].items():
+            self.stdout.write(
+                f"{key:<45} n={row['count']:>7}  p50 {row['p50_ms']:>8.1f}  p95 {row['p95_ms']:>8.1f}  "
+                f"p99 {row['p99_ms']:>8.1f} мс  4xx {row['client_errors']:>5}  "
+                f"ошибок {row['error_rate']:.2%}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Отчёт: {options['output']}")
@@ -1,17 +1,59 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils.deprecation import MiddlewareMixin
 
+from core.bus import bus
+from core.policy import get_policy_epoch
+from core.routers import (PRIMARY_DB, begin_request, end_request, is_pinned,
+                          pin_primary, replicas, use_primary)
+from users.cache import principal_cache
 from users.models import User
-from users.utils import decode_jwt_token
+from users.token_table import token_table
+from users.utils import decode_jwt_claims
+
+
+def _load_principal(user_id: int, token_version: int):
+    """Загрузка активного пользователя вместе с ролью (роль нужна проверкам прав)."""
+    qs = User.objects.select_related("role").filter(id=user_id, is_active=True)
+    user = qs.first()
+    if qs.db != PRIMARY_DB and (user is None or user.token_version < token_version):
+        # Токен новее реплики (вход на другом воркере после окна закрепления) — читаем основную БД
+        user = qs.using(PRIMARY_DB).first()
+    if user:
+        # Дополняем общую таблицу версий свежим состоянием из БД
+        token_table.publish(user.id, user.token_version, True)
+    return user
+
+
+def _request_user_id(request, response):
+    user_id = getattr(getattr(request, "user", None), "id", None)
+    if user_id is None:
+        # Вход и регистрация: субъект известен только из ответа
+        data = getattr(response, "data", None)
+        if isinstance(data, dict) and isinstance(data.get("user"), dict):
+            user_id = data["user"].get("id")
+    return user_id
 
 
 class JWTUserMiddleware(MiddlewareMixin):
     """Определяет request.user по JWT токену."""
 
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Фоновая доставка инвалидаций кэшей (один раз на процесс воркера)
+        bus.start()
+
     def process_request(self, request):
         # Сбить возможный кэш анонима и стартовать с None
         if hasattr(request, "_cached_user"):
             delattr(request, "_cached_user")
         request.user = None
+        request.token_permissions = None
 
         # Достаем Authorization: "Bearer <token>"
         auth = request.META.get("HTTP_AUTHORIZATION", "")
@@ -25,12 +67,26 @@ class JWTUserMiddleware(MiddlewareMixin):
             return
 
         # Переводим токен в user_id
-        user_id, token_version = decode_jwt_token(token)
-        if not user_id:
+        claims = decode_jwt_claims(token)
+        if not claims:
             return
+        user_id, token_version = claims["user_id"], claims["v"]
 
-        # Поиск активного пользователя
-        user = User.objects.filter(id=user_id, is_active=True).first()
+        # Отзыв токена по общей таблице версий — без запроса к БД. Токен новее таблицы
+        # (вход или смена пароля на другом хосте) проверяется по БД: _load_principal
+        # читает пользователя и дописывает в таблицу его текущую версию
+        state = token_table.read(user_id)
+        if state is not None:
+            current_version, is_active = state
+            if token_version < current_version or (not is_active and token_version == current_version):
+                return
+
+        # Субъект недавно писал — его чтения идут в основную БД, не в реплику
+        if is_pinned(user_id):
+            use_primary()
+
+        # Поиск активного пользователя (сначала в кэше воркера)
+        user = principal_cache.get_or_load(user_id, token_version, lambda: _load_principal(user_id, token_version))
         if not user:
             return
 
@@ -41,3 +97,76 @@ class JWTUserMiddleware(MiddlewareMixin):
         # Закидываем найденного пользователя
         request.user = user
         request._cached_user = user
+
+        # Права из токена годятся, пока роль та же и эпоха политики не сменилась
+        if "perm" in claims and claims.get("rid") == user.role_id and claims.get("pe") == get_policy_epoch():
+            request.token_permissions = claims["perm"]
+
+
+class ReadYourWritesMiddleware:
+    """
+    Разметка запроса для PrimaryReplicaRouter (core/routers.py): безопасные
+    методы читают из реплики, остальные — из основной БД. Если запрос что-то
+    записал, его субъект закрепляется за основной БД на READ_YOUR_WRITES_SECONDS;
+    JWTUserMiddleware переводит чтения закреплённого субъекта в основную БД.
+    Ставится перед JWTUserMiddleware.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request(primary=request.method not in self.SAFE_METHODS)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = end_request(token)
+        if wrote:
+            pin_primary(_request_user_id(request, response))
+        return response
+
+
+class RequestTraceMiddleware:
+    """
+    Запись трассы запросов в JSONL (REQUEST_TRACE_PATH) для воспроизведения
+    командой replay_load. Без персональных данных: вместо пути — шаблон
+    маршрута (api/admin/users/<int:pk>/), вместо id пользователя — его
+    ключевой хэш; тела и заголовки не пишутся.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        path = getattr(settings, "REQUEST_TRACE_PATH", "")
+        if not path:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+        self._key = hashlib.blake2b(settings.SECRET_KEY.encode("utf-8"), digest_size=32).digest()
+
+    def __call__(self, request):
+        started_at, started = time.time(), time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        user_id = _request_user_id(request, response)
+        record = {
+            "t": round(started_at, 3),
+            "method": request.method,
+            "endpoint": match.route if match else None,
+            "principal": self._principal(user_id) if user_id else None,
+            "status": response.status_code,
+            "ms": round(elapsed * 1000, 2),
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+        return response
+
+    def _principal(self, user_id) -> str:
+        return hashlib.blake2b(str(user_id).encode(), key=self._key, digest_size=8).hexdigest()
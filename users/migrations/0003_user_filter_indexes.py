@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:25
+
+from django.db import DatabaseError, migrations, models, transaction
+
+# Поиск ?q= — istartswith, т.е. UPPER(col::text) LIKE UPPER('...%');
+# такие выражения в PostgreSQL обслуживает GIN-индекс pg_trgm.
+TRIGRAM_INDEXES = (
+    ("users_user_email_trgm", "email"),
+    ("users_user_first_name_trgm", "first_name"),
+    ("users_user_last_name_trgm", "last_name"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        # Нет прав на расширение — поиск работает, но без индекса
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "users_user" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_epoch'),
+        ('users', '0002_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'is_active'], name='users_user_role_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='users_user_active_created_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,7 +1,14 @@
-import bcrypt
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.utils import timezone
 
+from core.bus import publish_on_commit
 from core.models import BaseModel, Role
+from users.cache import principal_cache
+from users.hashers import identify_hasher, make_password, verify_password
+from users.hashing import hashing_pool
+from users.token_table import token_table
+
+USER_TOPIC = "user"
 
 
 class User(BaseModel):
@@ -14,24 +21,103 @@ class User(BaseModel):
     token_version = models.PositiveIntegerField(default=0)
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, related_name="users", null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Фильтры списка администратора: ?role_id=&is_active=
+            models.Index(fields=["role", "is_active"], name="users_user_role_active_idx"),
+            # Активные пользователи по дате создания (?is_active=true&created_after=...)
+            models.Index(
+                fields=["created_at", "id"], name="users_user_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+        # Триграммные индексы для поиска ?q= (только PostgreSQL) — в миграции 0003
+
     def set_password(self, raw_password: str):
-        """Хэширование пароля по алгоритму bcrypt"""
-        hashes = bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt())
-        self.password = hashes.decode('utf-8')
+        """Хэширование пароля алгоритмом PASSWORD_HASHER (в ограниченном пуле)"""
+        self.password = hashing_pool.run(make_password, raw_password)
 
-    def check_password(self, raw_password: str) -> bool:
-        """Проверка пароля"""
-        return bcrypt.checkpw(raw_password.encode('utf-8'), self.password.encode('utf-8'))
+    def check_password(self, raw_password: str, *, rehash: bool = True) -> bool:
+        """
+        Проверка пароля (в ограниченном пуле).
+        Если хэш сохранён устаревшим алгоритмом или с другой стоимостью —
+        после успешной проверки пароль перехэшируется и сохраняется.
+        """
+        ok, must_update = hashing_pool.run(verify_password, raw_password, self.password)
+        if ok and must_update and rehash:
+            self.set_password(raw_password)
+            self.save(update_fields=["password"])
+        return ok
 
     def deactivate(self):
-        """'Мягкое' удаление"""
-        self.is_active = False
-        self.up_token_version()
-        self.save(update_fields=["is_active", "token_version"])
+        """'Мягкое' удаление: is_active=False и новая версия токена одним UPDATE"""
+        self._bump_token_version(is_active=False)
 
     def up_token_version(self):
-        self.token_version += 1
-        self.save(update_fields=["token_version"])
+        """Инвалидация всех выданных токенов одним атомарным UPDATE"""
+        self._bump_token_version()
+
+    def change_password(self, raw_password: str):
+        """Смена пароля и инвалидация токенов одним UPDATE"""
+        self.set_password(raw_password)
+        self._bump_token_version(password=self.password)
+
+    def _bump_token_version(self, **fields):
+        """Переход состояния одного пользователя: см. bump_token_versions()."""
+        fields["updated_at"] = timezone.now()
+        versions = User.bump_token_versions([self.pk], **fields)
+        if self.pk not in versions:
+            raise User.DoesNotExist(f"Пользователь id={self.pk} не найден")
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.token_version = versions[self.pk]
+        self.auth_state_changed()
+
+    @classmethod
+    def bump_token_versions(cls, ids, **fields) -> dict[int, int]:
+        """
+        UPDATE ... SET token_version = token_version + 1, <fields> WHERE id IN (...)
+        RETURNING id, token_version. Возвращает {id: новая версия} для найденных.
+
+        Один запрос на переход состояния (одного или многих пользователей);
+        инкремент выполняет БД, поэтому параллельные логины не теряют увеличения
+        версии. Для БД без UPDATE ... RETURNING — UPDATE с F() и чтение версий
+        в одной транзакции. Кэши не оповещаются — это делает вызывающий код.
+        """
+        ids = list(ids)
+        if not ids:
+            return {}
+        fields.setdefault("updated_at", timezone.now())
+        using = router.db_for_write(cls)
+        connection = connections[using]
+
+        if connection.vendor in ("postgresql", "sqlite"):
+            qn = connection.ops.quote_name
+            meta = cls._meta
+            assignments, params = [], []
+            for name, value in fields.items():
+                field = meta.get_field(name)
+                assignments.append(f"{qn(field.column)} = %s")
+                params.append(field.get_db_prep_save(value, connection))
+            version_column = qn(meta.get_field("token_version").column)
+            pk_column = qn(meta.pk.column)
+            sql = (
+                f"UPDATE {qn(meta.db_table)} "
+                f"SET {version_column} = {version_column} + 1, {', '.join(assignments)} "
+                f"WHERE {pk_column} IN ({', '.join(['%s'] * len(ids))}) "
+                f"RETURNING {pk_column}, {version_column}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [*params, *ids])
+                rows = cursor.fetchall()
+        else:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).filter(pk__in=ids).update(
+                    token_version=models.F("token_version") + 1, **fields,
+                )
+                rows = cls.objects.using(using).filter(pk__in=ids).values_list("pk", "token_version")
+                rows = list(rows)
+        return dict(rows)
 
     def save(self, *args, **kwargs):
         """
@@ -39,12 +125,58 @@ class User(BaseModel):
         Пароль хэшируется через set_password() перед сохранением, но
         через shell можно напрямую создать экземпляр без хэшпароля.
         """
-        bcrypt_prefixes = ("$2b$", "$2y$", "$2a$")
-        if not any(self.password.startswith(prefix) for prefix in bcrypt_prefixes):
-            # если поле password не похоже на bcrypt-хэш — хэшируем
+        if identify_hasher(self.password) is None:
+            # если поле password не похоже на хэш известного алгоритма — хэшируем
             self.set_password(self.password)
         super().save(*args, **kwargs)
+        self.auth_state_changed()
+
+    def auth_state_changed(self):
+        """
+        Оповещает кэши аутентификации об изменении пользователя:
+        профиль, роль, активность или версия токена могли измениться.
+        """
+        principal_cache.invalidate(self.id)
+        user_id, token_version, is_active = self.id, self.token_version, self.is_active
+        # В общую таблицу и шину инвалидации — только закоммиченное состояние
+        transaction.on_commit(lambda: token_table.publish(user_id, token_version, is_active))
+        publish_on_commit(USER_TOPIC, user_id)
+
+    @classmethod
+    def auth_states_changed(cls, states):
+        """
+        Пакетный вариант auth_state_changed(): states — [(id, token_version, is_active)].
+        Вместо события на каждого пользователя — один сброс топика целиком.
+        """
+        states = list(states)
+        for user_id, _, _ in states:
+            principal_cache.invalidate(user_id)
+
+        def publish():
+            for user_id, token_version, is_active in states:
+                token_table.publish(user_id, token_version, is_active)
+
+        transaction.on_commit(publish)
+        publish_on_commit(USER_TOPIC)
 
     def __str__(self):
         status = "активен" if self.is_active else "не активен"
         return f"Пользователь {self.email} ({status})"
+
+
+class RefreshToken(BaseModel):
+    """
+    Refresh-токен. Хранится только SHA-256 от случайной строки.
+    Токены одной цепочки ротации объединены family: повторное
+    использование уже обменянного токена отзывает всю цепочку.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="refresh_tokens")
+    token_hash = models.CharField(max_length=64, unique=True)
+    family = models.CharField(max_length=32, db_index=True)
+    token_version = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"RefreshToken(user={self.user_id}, family={self.family})"
@@ -0,0 +1,40 @@
+"""
+Курсорная (keyset) пагинация списков администратора.
+
+Страница выбирается условием WHERE id > <позиция из курсора> LIMIT N, поэтому
+стоимость любой страницы одинакова, как бы глубоко ни листал клиент
+(в отличие от OFFSET, который читает и отбрасывает все предыдущие строки).
+Курсор непрозрачный (base64 в ссылках next/previous).
+"""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+def _ordering():
+    # created_at — позиция по времени создания, id — порядок при совпадении
+    if getattr(settings, "ADMIN_USERS_CURSOR_ORDERING", "id") == "created_at":
+        return ("created_at", "id")
+    return ("id",)
+
+
+class UserCursorPagination(CursorPagination):
+    """?cursor=<непрозрачный курсор>&page_size=<N>; ответ: {"next", "previous", "results"}."""
+
+    ordering = _ordering()
+    page_size = getattr(settings, "ADMIN_USERS_PAGE_SIZE", 50)
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "ADMIN_USERS_MAX_PAGE_SIZE", 500)
+    columns = ()
+
+    def paginate_rows(self, queryset, row, request, view=None) -> list[dict]:
+        """Страница кортежей values_list() для RowSerializer row, без создания моделей."""
+        ordering = tuple(field.lstrip("-") for field in self.ordering)
+        queryset = row.values_list(queryset, *ordering)
+        self.columns = row.sources + tuple(column for column in ordering if column not in row.sources)
+        return row.many(self.paginate_queryset(queryset, request, view=view))
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, tuple):
+            return str(instance[self.columns.index(ordering[0].lstrip("-"))])
+        return super()._get_position_from_instance(instance, ordering)
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from core.utils.roles import get_default_user_role
+from core.utils.roles import DEFAULT_USER_ROLE_NAME, get_default_user_role
 
 from .models import User
 
@@ -69,6 +69,10 @@ class LoginSerializer(serializers.Serializer):
         return attrs
 
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField(write_only=True, trim_whitespace=True)
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     """Сериализатор профиля"""
 
@@ -100,7 +104,7 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError("Пользователь не найден")
 
         # Проверяем старый пароль
-        if not user.check_password(old):
+        if not user.check_password(old, rehash=False):
             raise serializers.ValidationError("Старый пароль указан неверно")
 
         # Совпадают ли новые?
@@ -114,9 +118,10 @@ class ChangePasswordSerializer(serializers.Serializer):
         return attrs
 
 
+from django.conf import settings
 from rest_framework import serializers
 
-from core.models import Role
+from core.policy import get_policy_snapshot
 
 from .models import User
 
@@ -146,12 +151,9 @@ class AdminUserCreateSerializer(serializers.Serializer):
         user = User(**validated_data)
         user.set_password(password)
 
-        # если роль не передана — по умолчанию "user"
+        # если роль не передана — по умолчанию "user" (из снимка политики)
         if role_id is None:
-            try:
-                user.role = Role.objects.get(name="user")
-            except Role.DoesNotExist:
-                user.role = None
+            user.role = get_policy_snapshot().role_by_name(DEFAULT_USER_ROLE_NAME)
         else:
             user.role_id = role_id
 
@@ -170,4 +172,42 @@ class AdminUserUpdateSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             "is_active": {"required": False},
             "role": {"required": False},
-        }
\ No newline at end of file
+        }
+
+
+class BulkUserItemSerializer(AdminUserCreateSerializer):
+    """
+    Элемент массового создания: те же поля, что при одиночном создании.
+    Уникальность email проверяется одним запросом на весь пакет (в view).
+    """
+
+    def validate_email(self, v):
+        return v.lower().strip()
+
+    def validate_role_id(self, v):
+        if v is not None and v not in get_policy_snapshot().roles_by_id:
+            raise serializers.ValidationError("Роль не найдена.")
+        return v
+
+
+class BulkUserCreateSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False,
+        max_length=getattr(settings, "ADMIN_BULK_MAX_ITEMS", 1000),
+    )
+
+
+class BulkUserIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=getattr(settings, "ADMIN_BULK_MAX_ITEMS", 1000),
+    )
+
+
+class BulkRoleChangeSerializer(BulkUserIdsSerializer):
+    role_id = serializers.IntegerField()
+
+    def validate_role_id(self, v):
+        if v not in get_policy_snapshot().roles_by_id:
+            raise serializers.ValidationError("Роль не найдена.")
+        return v
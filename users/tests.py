@@ -0,0 +1,331 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+from core.bus import PollingBus
+from core.policy import bump_policy_epoch, get_policy_snapshot
+from core.routers import PRIMARY_DB
+from users.cache import principal_cache
+from users.filters import filter_users
+from users.models import User
+from users.throttling import login_throttle
+from users.token_table import TokenVersionTable
+from users.utils import create_jwt_token
+
+PASSWORD = "Test123"
+
+
+class AuthTransitionQueriesTests(TestCase):
+    """
+    Число запросов переходов состояния: версия токена и поля меняются
+    одним UPDATE ... RETURNING, без чтения перед записью и повторного save().
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(email="queries@example.com", first_name="Тест", password=PASSWORD)
+        # Пользователь в middleware читается из БД, снимок политики уже загружен
+        principal_cache.clear()
+        get_policy_snapshot()
+        self.limits = login_throttle.email_limit, login_throttle.ip_limit
+        login_throttle.email_limit = login_throttle.ip_limit = 0
+
+    def tearDown(self):
+        login_throttle.email_limit, login_throttle.ip_limit = self.limits
+
+    def auth(self):
+        return {"HTTP_AUTHORIZATION": f"Bearer {create_jwt_token(self.user)}"}
+
+    def test_login(self):
+        # SELECT пользователя, UPDATE версии, INSERT refresh-токена
+        with self.assertNumQueries(3):
+            response = self.client.post("/api/users/login/", {"email": self.user.email, "password": PASSWORD},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+
+    def test_logout(self):
+        auth = self.auth()
+        # SELECT пользователя в middleware, UPDATE версии
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/users/logout/", **auth)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+
+    def test_change_password(self):
+        auth = self.auth()
+        # SELECT пользователя в middleware, UPDATE пароля вместе с версией
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/users/profile/password/",
+                                        {"old_password": PASSWORD, "new_password": "Changed456",
+                                         "new_password_repeat": "Changed456"},
+                                        content_type="application/json", **auth)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+        self.assertTrue(self.user.check_password("Changed456", rehash=False))
+
+    def test_deactivate(self):
+        auth = self.auth()
+        # SELECT пользователя в middleware, UPDATE is_active вместе с версией
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/users/profile/deactivate/", **auth)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.token_version, self.user.is_active), (1, False))
+
+
+class AdminDeactivateQueriesTests(TestCase):
+    """Деактивация администратором — тот же переход одним UPDATE, что и у самого пользователя."""
+
+    fixtures = ["core_data"]
+
+    def setUp(self):
+        # Снимок политики из фикстуры (сигналы loaddata в транзакции теста не доходят до шины)
+        bump_policy_epoch()
+        snapshot = get_policy_snapshot()
+        self.admin = User.objects.create(email="admin-queries@example.com", first_name="Админ",
+                                         password=PASSWORD, role=snapshot.role_by_name("admin"))
+        self.target = User.objects.create(email="target@example.com", first_name="Тест", password=PASSWORD)
+        principal_cache.clear()
+
+    def test_admin_deactivate(self):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {create_jwt_token(self.admin)}"}
+        # SELECT администратора в middleware, SELECT цели, UPDATE is_active вместе с версией
+        with self.assertNumQueries(3) as queries:
+            response = self.client.delete(f"/api/admin/users/{self.target.id}/", **auth)
+        self.assertEqual(response.status_code, 200)
+        updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"is_active" =', updates[0])
+        self.assertIn('"token_version" + 1', updates[0])
+        self.target.refresh_from_db()
+        self.assertEqual((self.target.token_version, self.target.is_active), (1, False))
+
+
+class TokenTableTests(TestCase):
+    """Таблица версий отсекает только старые токены; токен новее таблицы проверяется по БД."""
+
+    def setUp(self):
+        fd, path = tempfile.mkstemp(prefix="token-table-")
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        self.table = TokenVersionTable(path, slots=64)
+        patcher = mock.patch("users.middleware.token_table", self.table)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        principal_cache.clear()
+        self.user = User.objects.create(email="table@example.com", first_name="Тест", password=PASSWORD)
+
+    def tearDown(self):
+        self.table._mm.close()
+        os.close(self.table._fd)
+
+    def profile(self):
+        return self.client.get("/api/users/profile/",
+                               HTTP_AUTHORIZATION=f"Bearer {create_jwt_token(self.user)}")
+
+    def test_token_newer_than_table(self):
+        # Вход на другом хосте: в БД версия 1, в таблице этого хоста ещё 0
+        self.table.publish(self.user.id, 0, True)
+        User.bump_token_versions([self.user.id])
+        self.user.refresh_from_db()
+        self.assertEqual(self.profile().status_code, 200)
+        self.assertEqual(self.table.read(self.user.id), (1, True))
+
+    def test_token_older_than_table(self):
+        self.table.publish(self.user.id, 1, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.profile().status_code, 401)
+
+    def test_inactive_in_table(self):
+        self.table.publish(self.user.id, 0, False)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.profile().status_code, 401)
+
+
+class PollingBusStalenessTests(TestCase):
+    """
+    Окно устаревания шины polling: событие одного воркера доходит до другого
+    не позже чем за два опроса (два INVALIDATION_BUS_POLL_INTERVAL).
+    """
+
+    MAX_POLLS = 2
+    TOPIC = "test-user"
+    EPOCH_TOPIC = "test-epoch"
+
+    def setUp(self):
+        self.publisher, self.subscriber = PollingBus(), PollingBus()
+        self.published, self.received = [], []
+        for topic in (self.TOPIC, self.EPOCH_TOPIC):
+            self.publisher.subscribe(topic, lambda *event: self.published.append(event))
+            self.subscriber.subscribe(topic, lambda *event: self.received.append(event))
+        # Первый опрос запоминает текущее состояние журнала и эпох
+        self.publisher.poll()
+        self.subscriber.poll()
+
+    def polls_until_delivered(self) -> int:
+        for polls in range(1, self.MAX_POLLS + 1):
+            self.subscriber.poll()
+            if self.received:
+                return polls
+        self.fail(f"Событие не доставлено за {self.MAX_POLLS} опроса")
+
+    def test_keyed_event(self):
+        self.publisher.publish(self.TOPIC, 7)
+        self.publisher.poll()  # запись накопленных событий в журнал
+        self.assertLessEqual(self.polls_until_delivered(), self.MAX_POLLS)
+        self.assertEqual(self.received, [(self.TOPIC, 7, None)])
+        # Своё событие издателю повторно не доставляется
+        self.publisher.poll()
+        self.assertEqual(self.published, [(self.TOPIC, 7, None)])
+
+    def test_epoch_bump(self):
+        version = self.publisher.publish(self.EPOCH_TOPIC)
+        self.assertLessEqual(self.polls_until_delivered(), self.MAX_POLLS)
+        self.assertEqual(self.received, [(self.EPOCH_TOPIC, None, version)])
+        self.publisher.poll()
+        self.assertEqual(self.published, [(self.EPOCH_TOPIC, None, version)])
+
+
+# Форма плана (и триграммные индексы) — только у PostgreSQL
+@skipUnless(connection.vendor == "postgresql", "планы запросов проверяются на PostgreSQL")
+class UserFilterPlanTests(TestCase):
+    """Каждый фильтр списка пользователей обслуживается своим индексом, без Seq Scan."""
+
+    def explain(self, query: str) -> str:
+        qs = filter_users(User.objects.order_by(), QueryDict(query)).values("id")
+        with connection.cursor() as cursor:
+            # На пустой тестовой таблице планировщик выбрал бы Seq Scan и при наличии индекса
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return qs.explain()
+
+    def assertUsesIndexes(self, query: str, *indexes):
+        plan = self.explain(query)
+        self.assertNotIn("Seq Scan on users_user", plan)
+        for index in indexes:
+            self.assertIn(index, plan)
+
+    def test_role_and_active(self):
+        self.assertUsesIndexes("role_id=1&is_active=true", "users_user_role_active_idx")
+
+    def test_active_created_range(self):
+        self.assertUsesIndexes("is_active=true&created_after=2024-01-01&created_before=2030-01-01",
+                               "users_user_active_created_idx")
+
+    def test_prefix_search(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest("расширение pg_trgm недоступно — миграция 0003 не создала индексы")
+        self.assertUsesIndexes("q=admin", "users_user_email_trgm", "users_user_first_name_trgm",
+                               "users_user_last_name_trgm")
+
+
+REPLICA = getattr(settings, "REPLICA_TEST_ALIAS", "replica_test")
+PIN_SECONDS = 0.5
+
+
+# Реплика — зеркало default (settings.py): данные те же, различаются только соединения
+@skipUnless(REPLICA in settings.DATABASES, "нет алиаса реплики для тестов")
+@override_settings(DATABASE_REPLICAS=[REPLICA], DATABASE_ROUTERS=["core.routers.PrimaryReplicaRouter"],
+                   READ_YOUR_WRITES_SECONDS=PIN_SECONDS)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Чтение GET — из реплики, запись — в default, после записи субъект закреплён за default."""
+
+    databases = {PRIMARY_DB, REPLICA}
+
+    def setUp(self):
+        self.user = User.objects.create(email="routing@example.com", first_name="Тест", password=PASSWORD)
+        self.limits = login_throttle.email_limit, login_throttle.ip_limit
+        login_throttle.email_limit = login_throttle.ip_limit = 0
+
+    def tearDown(self):
+        login_throttle.email_limit, login_throttle.ip_limit = self.limits
+
+    def queries(self, request):
+        """Ответ и число запросов (основная БД, реплика)."""
+        # Кэш пользователей скрыл бы чтения middleware
+        principal_cache.clear()
+        with CaptureQueriesContext(connections[PRIMARY_DB]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = request()
+        return response, len(primary), len(replica)
+
+    def test_read_your_writes(self):
+        login, on_primary, on_replica = self.queries(lambda: self.client.post(
+            "/api/users/login/", {"email": self.user.email, "password": PASSWORD}, content_type="application/json",
+        ))
+        self.assertEqual(login.status_code, 200)
+        self.assertTrue(on_primary)
+        self.assertEqual(on_replica, 0)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {login.json()['access_token']}"}
+
+        # Сразу после входа субъект закреплён за основной БД
+        response, on_primary, on_replica = self.queries(lambda: self.client.get("/api/users/profile/", **auth))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(on_primary)
+        self.assertEqual(on_replica, 0)
+
+        # После READ_YOUR_WRITES_SECONDS чтения уходят в реплику
+        time.sleep(PIN_SECONDS + 0.1)
+        response, on_primary, on_replica = self.queries(lambda: self.client.get("/api/users/profile/", **auth))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(on_primary, 0)
+        self.assertTrue(on_replica)
+
+        # Запись — в основную БД, и субъект снова закреплён
+        response, on_primary, on_replica = self.queries(lambda: self.client.patch(
+            "/api/users/profile/", {"last_name": "Иванов"}, content_type="application/json", **auth,
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(on_primary)
+        self.assertEqual(on_replica, 0)
+        response, on_primary, on_replica = self.queries(lambda: self.client.get("/api/users/profile/", **auth))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(on_primary)
+        self.assertEqual(on_replica, 0)
+
+
+# Общая in-memory БД SQLite не допускает параллельных писателей — тест для PostgreSQL
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class TokenVersionConcurrencyTests(TransactionTestCase):
+    """Параллельные увеличения версии не теряются: инкремент выполняет БД."""
+
+    THREADS = 8
+    BUMPS = 5
+
+    def test_concurrent_bumps(self):
+        user = User.objects.create(email="threads@example.com", first_name="Тест", password=PASSWORD)
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                own = User.objects.get(pk=user.pk)
+                barrier.wait()
+                for _ in range(self.BUMPS):
+                    own.up_token_version()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        user.refresh_from_db()
+        self.assertEqual(user.token_version, self.THREADS * self.BUMPS)
@@ -0,0 +1,166 @@
+"""
+Ограничение частоты попыток входа — до проверки пароля (bcrypt).
+
+Лимиты считаются отдельно по нормализованному email и по IP клиента
+("N/секунд", например "10/300"). Бэкенды:
+  • local — скользящее окно в памяти процесса (лимит на воркер);
+  • cache — скользящее окно-счётчик в Django cache (общий для всех воркеров,
+    если CACHES указывает на Redis/Memcached/БД).
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """'10/300' -> (10, 300). Пустая строка или '0/..' — без лимита."""
+    if not rate:
+        return 0, 0
+    limit, seconds = rate.split("/")
+    return int(limit), int(seconds)
+
+
+class LocalBackend:
+    """Скользящее окно (журнал попыток) в памяти процесса; число ключей ограничено."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._hits = OrderedDict()  # key -> deque временных меток
+
+    def hit(self, key: str, limit: int, window: int) -> float:
+        """Регистрирует попытку. Возвращает 0, если можно, иначе сколько секунд ждать."""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+                while len(self._hits) > self.max_keys:
+                    self._hits.popitem(last=False)
+            self._hits.move_to_end(key)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window - now
+            hits.append(now)
+            return 0.0
+
+
+class CacheBackend:
+    """
+    Скользящее окно-счётчик в Django cache: текущее окно плюс взвешенное
+    предыдущее. Инкремент атомарный (cache.incr), так что лимит общий для всех воркеров.
+    """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    def hit(self, key: str, limit: int, window: int) -> float:
+        cache = caches[self.alias]
+        now = time.time()
+        bucket = int(now // window)
+        elapsed = now - bucket * window
+        current_key = f"login-throttle:{key}:{bucket}"
+        previous_key = f"login-throttle:{key}:{bucket - 1}"
+
+        values = cache.get_many([current_key, previous_key])
+        current = values.get(current_key, 0)
+        previous = values.get(previous_key, 0)
+        weight = 1 - elapsed / window
+        if previous * weight + current >= limit:
+            if current >= limit or not previous:
+                return window - elapsed
+            # Когда вес предыдущего окна упадёт настолько, что попытка поместится
+            free_at = window * (1 - (limit - current) / previous)
+            return max(free_at - elapsed, 0.001)
+
+        cache.add(current_key, 0, timeout=2 * window)
+        try:
+            cache.incr(current_key)
+        except ValueError:  # ключ успел истечь между add и incr
+            cache.set(current_key, 1, timeout=2 * window)
+        return 0.0
+
+
+class LoginThrottle:
+    """Лимиты попыток входа по email и по IP со счётчиками срабатываний."""
+
+    def __init__(self, backend, email_rate: str = "", ip_rate: str = "", trusted_proxies: int = 0):
+        self.backend = backend
+        self.trusted_proxies = trusted_proxies
+        self.email_limit, self.email_window = parse_rate(email_rate)
+        self.ip_limit, self.ip_window = parse_rate(ip_rate)
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "throttled_email": 0, "throttled_ip": 0}
+
+    def check(self, request, email) -> int | None:
+        """
+        Регистрирует попытку входа. Возвращает None, если вход можно
+        продолжать, иначе число секунд для Retry-After.
+        """
+        ip = client_ip(request, self.trusted_proxies)
+        checks = (
+            ("throttled_ip", f"ip:{ip}", self.ip_limit, self.ip_window),
+            ("throttled_email", f"email:{_digest(_normalize_email(email))}", self.email_limit, self.email_window),
+        )
+        for counter, key, limit, window in checks:
+            if not limit:
+                continue
+            wait = self.backend.hit(key, limit, window)
+            if wait > 0:
+                self._count(counter)
+                return max(1, math.ceil(wait))
+        self._count("allowed")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def client_ip(request, trusted_proxies: int = 0) -> str:
+    """
+    IP клиента для лимитов. X-Forwarded-For учитывается, только если перед
+    приложением стоят доверенные прокси (trusted_proxies > 0): берётся адрес,
+    добавленный самым дальним из них. Иначе заголовок подделывается клиентом,
+    и используется REMOTE_ADDR.
+    """
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if trusted_proxies > 0 and forwarded:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[-min(trusted_proxies, len(addresses))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _normalize_email(email) -> str:
+    return str(email or "").lower().strip()
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _build_login_throttle() -> LoginThrottle:
+    if getattr(settings, "LOGIN_THROTTLE_BACKEND", "local") == "cache":
+        backend = CacheBackend(getattr(settings, "LOGIN_THROTTLE_CACHE", "default"))
+    else:
+        backend = LocalBackend(getattr(settings, "LOGIN_THROTTLE_MAX_KEYS", 100000))
+    return LoginThrottle(
+        backend,
+        email_rate=getattr(settings, "LOGIN_THROTTLE_EMAIL_RATE", "10/300"),
+        ip_rate=getattr(settings, "LOGIN_THROTTLE_IP_RATE", "60/60"),
+        trusted_proxies=getattr(settings, "LOGIN_THROTTLE_TRUSTED_PROXIES", 0),
+    )
+
+
+login_throttle = _build_login_throttle()
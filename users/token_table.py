@@ -0,0 +1,167 @@
+"""
+Общая для всех воркеров хоста таблица user_id -> (token_version, is_active).
+
+Таблица лежит в memory-mapped файле (обычно в /dev/shm) и позволяет
+middleware проверять отзыв токена без запроса к БД. Источник истины — БД:
+таблица пересобирается при старте (команда rebuild_token_table) и
+дополняется при каждом чтении пользователя из БД.
+
+Устройство:
+  • открытая адресация, ключ — user_id (0 — пустой слот);
+  • запись — под flock на файл (писатели из разных процессов);
+  • чтение — без блокировок, по seqlock-счётчику слота.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows — таблица недоступна, работаем через БД
+    fcntl = None
+
+_MAGIC = b"TVT1"
+_HEADER = struct.Struct("<4s4xQ")  # magic, capacity
+_SLOT = struct.Struct("<IB3xQQ")  # seq, active, user_id, token_version
+_MAX_PROBE = 64
+_READ_RETRIES = 16
+
+
+class TokenVersionTable:
+    """Таблица версий токенов в общем mmap-файле (отключена, если path пуст)."""
+
+    def __init__(self, path: str = "", slots: int = 262144):
+        self.path = path
+        self.capacity = slots
+        self._fd = None
+        self._mm = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.capacity > 0 and fcntl is not None
+
+    # --- чтение ---
+
+    def read(self, user_id: int) -> tuple[int, bool] | None:
+        """(token_version, is_active) или None, если пользователя в таблице нет."""
+        if not self.enabled:
+            return None
+        mm = self._mapping()
+        for offset in self._probe(user_id):
+            for _ in range(_READ_RETRIES):
+                seq, active, slot_user, version = _SLOT.unpack_from(mm, offset)
+                if seq & 1:
+                    continue  # слот сейчас пишется
+                if _SLOT.unpack_from(mm, offset)[0] == seq:
+                    break
+            else:
+                return None
+            if slot_user == user_id:
+                return version, bool(active)
+            if slot_user == 0:
+                return None
+        return None
+
+    # --- запись ---
+
+    def publish(self, user_id: int, token_version: int, is_active: bool):
+        """
+        Записывает состояние пользователя. Версия не откатывается назад:
+        запись с меньшей версией (гонка воркеров) игнорируется.
+        """
+        if not self.enabled or not user_id:
+            return
+        mm = self._mapping()
+        with self._locked():
+            for offset in self._probe(user_id):
+                seq, _, slot_user, version = _SLOT.unpack_from(mm, offset)
+                if slot_user == user_id and token_version < version:
+                    return
+                if slot_user in (0, user_id):
+                    self._write_slot(mm, offset, seq, is_active, user_id, token_version)
+                    return
+            # Свободного слота нет — пользователь будет проверяться через БД
+
+    def rebuild(self, rows):
+        """Очищает таблицу и заполняет её строками (user_id, token_version, is_active)."""
+        if not self.enabled:
+            return 0
+        mm = self._mapping()
+        count = 0
+        with self._locked():
+            mm[_HEADER.size:] = bytes(len(mm) - _HEADER.size)
+            for user_id, token_version, is_active in rows:
+                for offset in self._probe(user_id):
+                    seq, _, slot_user, _ = _SLOT.unpack_from(mm, offset)
+                    if slot_user == 0:
+                        self._write_slot(mm, offset, seq, is_active, user_id, token_version)
+                        count += 1
+                        break
+        return count
+
+    # --- внутреннее ---
+
+    @staticmethod
+    def _write_slot(mm, offset, seq, is_active, user_id, token_version):
+        writing = ((seq + 1) | 1) & 0xFFFFFFFF  # нечётный seq — слот пишется
+        struct.pack_into("<I", mm, offset, writing)
+        _SLOT.pack_into(mm, offset, writing, 1 if is_active else 0, user_id, token_version)
+        struct.pack_into("<I", mm, offset, (writing + 1) & 0xFFFFFFFF)
+
+    def _probe(self, user_id: int):
+        start = user_id % self.capacity
+        for i in range(min(_MAX_PROBE, self.capacity)):
+            yield _HEADER.size + ((start + i) % self.capacity) * _SLOT.size
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _mapping(self):
+        # После fork каждый процесс открывает файл заново
+        if self._mm is not None and self._pid == os.getpid():
+            return self._mm
+        with self._lock:
+            if self._mm is None or self._pid != os.getpid():
+                self._open()
+        return self._mm
+
+    def _open(self):
+        size = _HEADER.size + self.capacity * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            header_ok = False
+            if os.fstat(fd).st_size == size:
+                magic, capacity = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+                header_ok = magic == _MAGIC and capacity == self.capacity
+            if not header_ok:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC, self.capacity), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._mm = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        self._pid = os.getpid()
+
+
+def _build_token_table() -> TokenVersionTable:
+    from django.conf import settings
+    return TokenVersionTable(
+        path=getattr(settings, "JWT_TOKEN_TABLE_PATH", ""),
+        slots=getattr(settings, "JWT_TOKEN_TABLE_SLOTS", 262144),
+    )
+
+
+token_table = _build_token_table()
@@ -6,6 +6,7 @@ app_name = 'users'
 urlpatterns = [
     path("registration/", views.RegistrationView.as_view(), name="registration"),  # POST
     path("login/", views.LoginView.as_view(), name="login"),  # POST
+    path("token/refresh/", views.TokenRefreshView.as_view(), name="token_refresh"),  # POST
 
     path("profile/", views.ProfileView.as_view(), name="profile"),  # GET, PATCH
 
@@ -13,4 +14,6 @@ urlpatterns = [
     path('logout/', views.LogoutView.as_view(), name='logout'),  # POST
     path("profile/deactivate/", views.SoftDeactivateMeView.as_view(), name="soft_deactivate"),
 
+    path("jwks/", views.JWKSView.as_view(), name="jwks"),  # GET
+
 ]
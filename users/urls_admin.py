@@ -1,10 +1,18 @@
 from django.urls import path
 
-from users.views_admin import AdminUserDetailView, AdminUserListCreateView
+from users.views_admin import (AdminMetricsView, AdminUserBulkCreateView,
+                               AdminUserBulkDeactivateView,
+                               AdminUserBulkRoleView, AdminUserDetailView,
+                               AdminUserExportView, AdminUserListCreateView)
 
 app_name = "users_admin"
 
 urlpatterns = [
     path("users/", AdminUserListCreateView.as_view(), name="admin_user_list_create"),
+    path("users/bulk/", AdminUserBulkCreateView.as_view(), name="admin_user_bulk_create"),
+    path("users/bulk/deactivate/", AdminUserBulkDeactivateView.as_view(), name="admin_user_bulk_deactivate"),
+    path("users/bulk/role/", AdminUserBulkRoleView.as_view(), name="admin_user_bulk_role"),
+    path("users/export/", AdminUserExportView.as_view(), name="admin_user_export"),
     path("users/<int:pk>/", AdminUserDetailView.as_view(), name="admin_user_detail"),
+    path("metrics/", AdminMetricsView.as_view(), name="admin_metrics"),
 ]
\ No newline at end of file
@@ -3,17 +3,29 @@
 
 """
 
+import hashlib
+import secrets
 from datetime import UTC, datetime, timedelta
 
 import jwt
 from django.conf import settings
+from django.db.models import Max, Min, Q
 
-from users.models import User
+from core.policy import get_policy_snapshot
+from users.cache import token_cache
+from users.keys import keyring
+from users.models import RefreshToken, User
 
 # Настройки токенов (позже вынесу в .env)
 JWT_SECRET = getattr(settings, "SECRET_KEY", "default_secret")
 JWT_ALGORITHM = "HS256"
-JWT_EXP_DELTA_HOURS = 24
+# Access-токен короткий: продлевается через refresh-токен без проверки пароля
+JWT_ACCESS_TOKEN_LIFETIME = timedelta(minutes=getattr(settings, "JWT_ACCESS_TOKEN_MINUTES", 15))
+JWT_REFRESH_TOKEN_LIFETIME = timedelta(days=getattr(settings, "JWT_REFRESH_TOKEN_DAYS", 30))
+# Вшивать ли в токен роль и маски прав (авторизация без БД, пока эпоха политики актуальна)
+JWT_EMBED_PERMISSIONS = getattr(settings, "JWT_EMBED_PERMISSIONS", False)
+# Принимать ли HS256-токены без kid, когда включены асимметричные ключи (переходный период)
+JWT_ACCEPT_HS256 = getattr(settings, "JWT_ACCEPT_HS256", True)
 
 
 def create_jwt_token(user: User) -> str:
@@ -26,30 +38,164 @@ def create_jwt_token(user: User) -> str:
       iat (issued at): время выпуска токена;
       exp (expiration): время истечения действия токена.
 
+    Подпись: ключом JWT_ACTIVE_KID (EdDSA/ES256, kid в заголовке),
+    если задан JWT_KEYS_DIR; иначе HS256 с SECRET_KEY.
+
+    При JWT_EMBED_PERMISSIONS дополнительно:
+      rid: id роли;
+      perm: маски прав роли {element_name: mask};
+      pe: эпоха политики RBAC, на момент которой посчитаны маски.
+
     """
     payload = {
         "user_id": user.id,
         "v": user.token_version,
         "iat": datetime.now(UTC),
-        "exp": datetime.now(UTC) + timedelta(hours=JWT_EXP_DELTA_HOURS),
+        "exp": datetime.now(UTC) + JWT_ACCESS_TOKEN_LIFETIME,
     }
+    if JWT_EMBED_PERMISSIONS:
+        # Маски и эпоха из одного снимка политики: если политика уже
+        # изменилась, токен получит старую эпоху и уйдёт на проверку через снимок
+        snapshot = get_policy_snapshot()
+        payload["pe"] = snapshot.epoch
+        payload["rid"] = user.role_id
+        payload["perm"] = snapshot.role_masks(user.role_id)
+    if keyring.enabled:
+        kid, algorithm, key = keyring.signing_key()
+        return jwt.encode(payload, key, algorithm=algorithm, headers={"kid": kid})
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return token
 
 
-def decode_jwt_token(token: str) -> tuple[int, int] | None:
+def _verification_key(token: str):
+    """Ключ и алгоритм проверки по заголовку токена: kid -> открытый ключ, без kid -> HS256."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        if keyring.enabled and not JWT_ACCEPT_HS256:
+            raise jwt.InvalidTokenError("HS256-токены отключены")
+        return JWT_SECRET, JWT_ALGORITHM
+    if not keyring.enabled:
+        raise jwt.InvalidTokenError("Асимметричные ключи не настроены")
+    found = keyring.verification_key(kid)
+    if found is None:
+        raise jwt.InvalidTokenError(f"Неизвестный kid: {kid}")
+    algorithm, key = found
+    return key, algorithm
+
+
+def decode_jwt_claims(token: str) -> dict | None:
     """
-    Проверка JWT-токена и извлечение user_id.
+    Проверка JWT-токена и извлечение полезной нагрузки.
     Возвращает None, если токен истёк или некорректен.
+    user_id и v в результате уже приведены к int.
+
+    Если включён JWT_TOKEN_CACHE_SIZE, повторно присланный токен
+    берётся из кэша проверенных токенов без повторной проверки подписи.
     """
+    key = None
+    if token_cache.enabled:
+        key = token_cache.digest(token)
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = int(payload["user_id"])
-        token_version = int(payload["v"])
-        return user_id, token_version
+        verify_key, algorithm = _verification_key(token)
+        payload = jwt.decode(token, verify_key, algorithms=[algorithm])
+        payload["user_id"] = int(payload["user_id"])
+        payload["v"] = int(payload["v"])
     except jwt.ExpiredSignatureError:
         # Токен просрочен
         return None
-    except jwt.InvalidTokenError:
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
         # Токен некорректен
-        return None
\ No newline at end of file
+        return None
+
+    if key is not None:
+        token_cache.put(key, payload, payload["exp"])
+    return payload
+
+
+def decode_jwt_token(token: str) -> tuple[int, int] | None:
+    """
+    Проверка JWT-токена и извлечение user_id.
+    Возвращает (user_id, token_version) или None, если токен истёк или некорректен.
+    """
+    claims = decode_jwt_claims(token)
+    if claims is None:
+        return None
+    return claims["user_id"], claims["v"]
+
+
+class RefreshTokenError(Exception):
+    """Refresh-токен неизвестен, истёк, отозван или уже использован."""
+
+
+def _hash_refresh_token(raw_token: str) -> str:
+    # Токен — 256 бит случайности, медленный хэш здесь не нужен
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
+def create_refresh_token(user: User, *, family: str | None = None) -> str:
+    """
+    Выпуск refresh-токена. В БД сохраняется только хэш.
+    Токен привязан к текущей token_version: logout/смена пароля его аннулируют.
+    """
+    raw_token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=_hash_refresh_token(raw_token),
+        family=family or secrets.token_hex(16),
+        token_version=user.token_version,
+        expires_at=datetime.now(UTC) + JWT_REFRESH_TOKEN_LIFETIME,
+    )
+    return raw_token
+
+
+def rotate_refresh_token(raw_token: str) -> tuple[User, str]:
+    """
+    Обмен refresh-токена на новый (ротация). Возвращает (user, новый refresh-токен).
+
+    Повторное предъявление уже использованного токена считается утечкой:
+    вся цепочка (family) отзывается. Пароль не проверяется — bcrypt не нужен.
+    """
+    token_hash = _hash_refresh_token(raw_token)
+    record = RefreshToken.objects.select_related("user").filter(token_hash=token_hash).first()
+    if record is None or record.revoked_at is not None:
+        raise RefreshTokenError("Недействительный refresh-токен.")
+
+    now = datetime.now(UTC)
+    # Помечаем использованным условно: из двух параллельных обменов выиграет один
+    claimed = RefreshToken.objects.filter(pk=record.pk, used_at__isnull=True, revoked_at__isnull=True).update(
+        used_at=now, updated_at=now,
+    )
+    if not claimed:
+        RefreshToken.objects.filter(family=record.family, revoked_at__isnull=True).update(
+            revoked_at=now, updated_at=now,
+        )
+        raise RefreshTokenError("Refresh-токен уже использован. Все сессии цепочки отозваны.")
+
+    user = record.user
+    if record.expires_at <= now or not user.is_active or user.token_version != record.token_version:
+        raise RefreshTokenError("Недействительный refresh-токен.")
+
+    return user, create_refresh_token(user, family=record.family)
+
+
+def prune_refresh_tokens(batch_size: int = 10000) -> int:
+    """
+    Удаляет истёкшие и отозванные refresh-токены; возвращает число удалённых.
+
+    Использованные, но не истёкшие записи остаются: по ним распознаётся повторное
+    предъявление токена и отзывается цепочка. Удаление идёт диапазонами первичного
+    ключа — короткие транзакции и чтение по индексу вместо одного большого DELETE.
+    """
+    bounds = RefreshToken.objects.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return 0
+    dead = Q(expires_at__lte=datetime.now(UTC)) | Q(revoked_at__isnull=False)
+    deleted = 0
+    for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+        count, _ = RefreshToken.objects.filter(dead, pk__gte=start, pk__lt=start + batch_size).delete()
+        deleted += count
+    return deleted
@@ -1,11 +1,26 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.conditional import (make_etag, not_modified,
+                              patch_conditional_headers, timestamp_version)
+from core.rows import RowSerializer
+
+from .keys import keyring
 from .mixins import BaseJWTAPIView
 from .serializers import (ChangePasswordSerializer, LoginSerializer,
-                          ProfileSerializer, RegisterSerializer)
-from .utils import create_jwt_token
+                          ProfileSerializer, RegisterSerializer,
+                          TokenRefreshSerializer)
+from .throttling import login_throttle
+from .utils import (JWT_ACCESS_TOKEN_LIFETIME, RefreshTokenError,
+                    create_jwt_token, create_refresh_token,
+                    rotate_refresh_token)
+
+# Поля ProfileSerializer: ответ собирается без обхода полей сериализатора
+PROFILE_ROW = RowSerializer(*ProfileSerializer.Meta.fields)
 
 
 class RegistrationView(APIView):
@@ -34,21 +49,30 @@ class RegistrationView(APIView):
 
 class LoginView(APIView):
     """
-    Вход по email и паролю. Возвращает JWT-токен и базовые данные пользователя.
+    Вход по email и паролю. Возвращает JWT-токен, refresh-токен и базовые данные пользователя.
     """
 
     def post(self, request):
+        # Лимит попыток по email и IP — до того, как дойдёт до bcrypt
+        email = request.data.get("email") if isinstance(request.data, dict) else None
+        wait = login_throttle.check(request, email)
+        if wait is not None:
+            raise Throttled(wait=wait)
+
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
         user.up_token_version()
         token = create_jwt_token(user)
+        refresh_token = create_refresh_token(user)
 
         return Response(
             {
                 "access_token": token,
+                "refresh_token": refresh_token,
                 "token_type": "Bearer",
+                "expires_in": int(JWT_ACCESS_TOKEN_LIFETIME.total_seconds()),
                 "user": {
                     "id": user.id,
                     "email": user.email,
@@ -60,14 +84,49 @@ class LoginView(APIView):
         )
 
 
+class TokenRefreshView(APIView):
+    """
+    Обмен refresh-токена на новую пару токенов (без проверки пароля и bcrypt).
+    Refresh-токен одноразовый: при каждом обмене выдаётся новый.
+    """
+
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            user, refresh_token = rotate_refresh_token(serializer.validated_data["refresh_token"])
+        except RefreshTokenError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(
+            {
+                "access_token": create_jwt_token(user),
+                "refresh_token": refresh_token,
+                "token_type": "Bearer",
+                "expires_in": int(JWT_ACCESS_TOKEN_LIFETIME.total_seconds()),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class ProfileView(BaseJWTAPIView):
-    """GET — профиль; PATCH — частичное обновление профиля."""
+    """
+    GET — профиль (ETag по id и updated_at, If-None-Match -> 304);
+    PATCH — частичное обновление профиля.
+    """
 
     def get(self, request):
         user = self.current_user(request)
         if not getattr(user, "id", None):
             return Response({"detail": "Не авторизован"}, status=status.HTTP_401_UNAUTHORIZED)
-        return Response(ProfileSerializer(user).data, status=status.HTTP_200_OK)
+        # Пользователь уже загружен middleware — версию знаем без запросов к БД
+        etag = self._etag(request, user)
+        max_age = getattr(settings, "PROFILE_MAX_AGE", 0)
+        response = not_modified(request, etag, max_age)
+        if response is None:
+            response = Response(PROFILE_ROW.from_instance(user), status=status.HTTP_200_OK)
+        return patch_conditional_headers(response, etag, max_age)
 
     def patch(self, request):
         user = self.current_user(request)
@@ -76,7 +135,12 @@ class ProfileView(BaseJWTAPIView):
         s = ProfileSerializer(instance=user, data=request.data, partial=True)
         s.is_valid(raise_exception=True)
         user = s.save()
-        return Response(ProfileSerializer(user).data, status=status.HTTP_200_OK)
+        response = Response(PROFILE_ROW.from_instance(user), status=status.HTTP_200_OK)
+        return patch_conditional_headers(response, self._etag(request, user), getattr(settings, "PROFILE_MAX_AGE", 0))
+
+    @staticmethod
+    def _etag(request, user) -> str:
+        return make_etag(request, "profile", user.id, timestamp_version(user.updated_at))
 
 
 class ChangePasswordView(BaseJWTAPIView):
@@ -96,13 +160,9 @@ class ChangePasswordView(BaseJWTAPIView):
         )
         serializer.is_valid(raise_exception=True)
 
-        # Меняем пароль
+        # Меняем пароль и инвалидируем выданные токены (один UPDATE)
         new_pass = serializer.validated_data["new_password"]
-        user.set_password(new_pass)
-        user.save()
-
-        # инвалидация выданного токена
-        user.up_token_version()
+        user.change_password(new_pass)
 
         return Response({"message": "Пароль успешно изменён"}, status=status.HTTP_200_OK)
 
@@ -145,3 +205,17 @@ class SoftDeactivateMeView(BaseJWTAPIView):
             {"message": "Аккаунт деактивирован. Все сессии завершены."},
             status=status.HTTP_200_OK
         )
+
+
+class JWKSView(APIView):
+    """
+    Открытые ключи подписи JWT в формате JWKS.
+    Другие сервисы кэшируют ответ и проверяют токены локально по kid.
+    """
+    authentication_classes = []
+
+    def get(self, request):
+        data = keyring.jwks() if keyring.enabled else {"keys": []}
+        response = Response(data, status=status.HTTP_200_OK)
+        patch_cache_control(response, public=True, max_age=getattr(settings, "JWT_JWKS_MAX_AGE", 300))
+        return response
@@ -1,18 +1,43 @@
 # premisions
+import csv
+import json
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from rest_framework import status
 from rest_framework.response import Response
 
 from core.mixins import AccessControlMixin
+from core.policy import get_policy_snapshot
+from core.rows import RowSerializer
+from core.utils.roles import DEFAULT_USER_ROLE_NAME
+from core.views_rbac import ensure_admin
+from users.cache import principal_cache, token_cache
+from users.filters import FilterError, filter_users
+from users.hashers import make_password
+from users.hashing import hashing_pool
 from users.mixins import BaseJWTAPIView
+from users.pagination import UserCursorPagination
+from users.throttling import login_throttle
 from users.models import User
 from users.serializers import (AdminUserCreateSerializer,
-                               AdminUserUpdateSerializer)
+                               AdminUserUpdateSerializer,
+                               BulkRoleChangeSerializer,
+                               BulkUserCreateSerializer,
+                               BulkUserIdsSerializer, BulkUserItemSerializer)
+
+USER_LIST_FIELDS = ("id", "email", "first_name", "last_name", "middle_name", "is_active", "role_id")
+USER_ROW = RowSerializer(*USER_LIST_FIELDS)
 
 
 class AdminUserListCreateView(BaseJWTAPIView, AccessControlMixin):
     """
-    GET:
+    GET (курсорная пагинация: ?cursor=..., ?page_size=...; фильтры — users/filters.py):
       - admin/manager: видят всех (read_all)
       - user: видит только себя (read own)
       - guest: 403
@@ -21,30 +46,21 @@ class AdminUserListCreateView(BaseJWTAPIView, AccessControlMixin):
       - user/guest: 403
     """
     element_name = "users"
+    owner_field = "id"
 
     def get(self, request):
-        scope, resp = self.check_read_scope(request)
+        qs, resp = self.scoped_queryset(request, User.objects.all())
         if resp:
             return resp
+        try:
+            qs = filter_users(qs, request.query_params)
+        except FilterError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if scope == "all":
-            qs = User.objects.all()
-        else:
-            qs = User.objects.filter(id=request.user.id)
-
-        data = [
-            {
-                "id": u.id,
-                "email": u.email,
-                "first_name": u.first_name,
-                "last_name": u.last_name,
-                "middle_name": u.middle_name,
-                "is_active": u.is_active,
-                "role_id": u.role_id,
-            }
-            for u in qs
-        ]
-        return Response(data, status=status.HTTP_200_OK)
+        # Keyset-пагинация: в БД уходит только одна страница, строки — кортежи без моделей
+        paginator = UserCursorPagination()
+        data = paginator.paginate_rows(qs, USER_ROW, request, view=self)
+        return paginator.get_paginated_response(data)
 
     def post(self, request):
         # RBAC: create разрешён admin/manager
@@ -55,18 +71,92 @@ class AdminUserListCreateView(BaseJWTAPIView, AccessControlMixin):
         s = AdminUserCreateSerializer(data=request.data)
         s.is_valid(raise_exception=True)
         user = s.save()
-        return Response(
-            {
-                "id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "middle_name": user.middle_name,
-                "is_active": user.is_active,
-                "role_id": user.role_id,
-            },
-            status=status.HTTP_201_CREATED,
+        return Response(USER_ROW.from_instance(user), status=status.HTTP_201_CREATED)
+
+
+EXPORT_FIELDS = USER_LIST_FIELDS + ("created_at",)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "users.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "users.csv"),
+}
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _export_lines(rows, fmt):
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row["created_at"] = row["created_at"].isoformat()
+        if fmt == "csv":
+            yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+        else:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def _export_chunks(lines, *, compress: bool, buffer_size: int = 64 * 1024):
+    """Склеивает строки в блоки ~buffer_size байт и, если нужно, сжимает gzip на лету."""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            chunk = b"".join(buffer)
+            buffer, size = [], 0
+            chunk = gzip.compress(chunk) if gzip else chunk
+            if chunk:
+                yield chunk
+    tail = b"".join(buffer)
+    if gzip:
+        tail = gzip.compress(tail) + gzip.flush()
+    if tail:
+        yield tail
+
+
+class AdminUserExportView(BaseJWTAPIView, AccessControlMixin):
+    """
+    GET /admin/users/export/?fmt=ndjson|csv — потоковая выгрузка пользователей (read / read_all),
+    с теми же фильтрами, что у списка.
+    Строки читаются серверным курсором (values().iterator()), память не растёт
+    с числом пользователей. При Accept-Encoding: gzip ответ сжимается на лету.
+    """
+    element_name = "users"
+    owner_field = "id"
+
+    def get(self, request):
+        qs, resp = self.scoped_queryset(request, User.objects.all())
+        if resp:
+            return resp
+        try:
+            qs = filter_users(qs, request.query_params)
+        except FilterError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.query_params.get("fmt", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            return Response({"detail": "fmt: ndjson или csv"}, status=status.HTTP_400_BAD_REQUEST)
+        content_type, filename = EXPORT_FORMATS[fmt]
+
+        rows = qs.order_by("id").values(*EXPORT_FIELDS).iterator(
+            chunk_size=getattr(settings, "ADMIN_EXPORT_CHUNK_SIZE", 2000)
+        )
+        compress = "gzip" in request.headers.get("Accept-Encoding", "")
+        response = StreamingHttpResponse(
+            _export_chunks(_export_lines(rows, fmt), compress=compress), content_type=content_type,
         )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
 
 
 class AdminUserDetailView(BaseJWTAPIView, AccessControlMixin):
@@ -76,9 +166,10 @@ class AdminUserDetailView(BaseJWTAPIView, AccessControlMixin):
     DELETE /admin/users/<id>/ : delete / delete_all (у менеджера нет)
     """
     element_name = "users"
+    owner_field = "id"
 
     def _is_owner(self, request, target: User) -> bool:
-        return target.id == request.user.id
+        return self.is_owner(request, target)
 
     def get(self, request, pk: int):
         target = get_object_or_404(User, pk=pk)
@@ -88,16 +179,7 @@ class AdminUserDetailView(BaseJWTAPIView, AccessControlMixin):
         if resp:
             return resp
 
-        data = {
-            "id": target.id,
-            "email": target.email,
-            "first_name": target.first_name,
-            "last_name": target.last_name,
-            "middle_name": target.middle_name,
-            "is_active": target.is_active,
-            "role_id": target.role_id,
-        }
-        return Response(data, status=status.HTTP_200_OK)
+        return Response(USER_ROW.from_instance(target), status=status.HTTP_200_OK)
 
     def patch(self, request, pk: int):
         """Обновление полей доступно только admin/manager"""
@@ -112,18 +194,7 @@ class AdminUserDetailView(BaseJWTAPIView, AccessControlMixin):
         s = AdminUserUpdateSerializer(instance=target, data=request.data, partial=True)
         s.is_valid(raise_exception=True)
         user = s.save()
-        return Response(
-            {
-                "id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "middle_name": user.middle_name,
-                "is_active": user.is_active,
-                "role_id": user.role_id,
-            },
-            status=status.HTTP_200_OK,
-        )
+        return Response(USER_ROW.from_instance(user), status=status.HTTP_200_OK)
 
 
     def delete(self, request, pk: int):
@@ -137,4 +208,166 @@ class AdminUserDetailView(BaseJWTAPIView, AccessControlMixin):
             return resp
 
         target.deactivate()
-        return Response({"message": "Пользователь деактивирован"}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({"message": "Пользователь деактивирован"}, status=status.HTTP_200_OK)
+
+
+def _bulk_results(ids, done, done_status: str) -> list[dict]:
+    """
+    Результат по каждому id: done_status, "forbidden" (есть, но вне прав)
+    или "not_found". Для не попавших в done — один дополнительный запрос.
+    """
+    missing = [user_id for user_id in ids if user_id not in done]
+    existing = set(User.objects.filter(id__in=missing).values_list("id", flat=True)) if missing else set()
+    results = []
+    for user_id in ids:
+        if user_id in done:
+            results.append({"id": user_id, "status": done_status})
+        else:
+            results.append({"id": user_id, "status": "forbidden" if user_id in existing else "not_found"})
+    return results
+
+
+class AdminUserBulkCreateView(BaseJWTAPIView, AccessControlMixin):
+    """
+    POST /admin/users/bulk/ {"users": [{email, first_name, password, ...}, ...]} : create
+
+    Права проверяются один раз, пароли хэшируются параллельно в пуле,
+    пользователи создаются одним bulk_create в одной транзакции.
+    Ответ — результат по каждому элементу (created / invalid).
+    """
+    element_name = "users"
+
+    def post(self, request):
+        resp = self.check_action_permission(request, action="create")
+        if resp:
+            return resp
+
+        s = BulkUserCreateSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+
+        results, valid = [], []
+        seen = set()
+        for index, item in enumerate(s.validated_data["users"]):
+            item_serializer = BulkUserItemSerializer(data=item)
+            if not item_serializer.is_valid():
+                results.append({"index": index, "status": "invalid", "errors": item_serializer.errors})
+                continue
+            data = item_serializer.validated_data
+            if data["email"] in seen:
+                results.append({"index": index, "status": "invalid",
+                                "errors": {"email": ["Email повторяется в запросе."]}})
+                continue
+            seen.add(data["email"])
+            results.append(None)
+            valid.append((index, data))
+
+        # Уникальность email — одним запросом на весь пакет
+        taken = set(User.objects.filter(email__in=seen).values_list("email", flat=True))
+        rows = []
+        for index, data in valid:
+            if data["email"] in taken:
+                results[index] = {"index": index, "status": "invalid",
+                                  "errors": {"email": ["Пользователь с таким email уже существует."]}}
+            else:
+                rows.append((index, data))
+
+        hashes = hashing_pool.map(make_password, [data["password"] for _, data in rows])
+        default_role = get_policy_snapshot().role_by_name(DEFAULT_USER_ROLE_NAME)
+        users = [
+            User(
+                email=data["email"],
+                first_name=data["first_name"],
+                last_name=data.get("last_name"),
+                middle_name=data.get("middle_name"),
+                password=password,
+                role_id=data.get("role_id") or getattr(default_role, "id", None),
+            )
+            for (_, data), password in zip(rows, hashes)
+        ]
+
+        try:
+            with transaction.atomic():
+                created = User.objects.bulk_create(users)
+                User.auth_states_changed((user.id, user.token_version, user.is_active) for user in created)
+        except IntegrityError:
+            return Response({"detail": "Email уже занят параллельным запросом, повторите."},
+                            status=status.HTTP_409_CONFLICT)
+
+        for (index, _), user in zip(rows, created):
+            results[index] = {"index": index, "status": "created", "id": user.id}
+        return Response({"created": len(created), "results": results}, status=status.HTTP_200_OK)
+
+
+class AdminUserBulkDeactivateView(BaseJWTAPIView, AccessControlMixin):
+    """
+    POST /admin/users/bulk/deactivate/ {"ids": [...]} : delete / delete_all
+
+    Один UPDATE деактивирует всех доступных пользователей и увеличивает
+    их token_version (выданные токены перестают действовать).
+    """
+    element_name = "users"
+    owner_field = "id"
+
+    def post(self, request):
+        s = BulkUserIdsSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(s.validated_data["ids"]))
+
+        qs, resp = self.scoped_queryset(request, User.objects.filter(id__in=ids), action="delete")
+        if resp:
+            return resp
+
+        with transaction.atomic():
+            allowed = list(qs.values_list("id", flat=True))
+            versions = User.bump_token_versions(allowed, is_active=False)
+            User.auth_states_changed((user_id, version, False) for user_id, version in versions.items())
+
+        results = _bulk_results(ids, versions, "deactivated")
+        return Response({"deactivated": len(versions), "results": results}, status=status.HTTP_200_OK)
+
+
+class AdminUserBulkRoleView(BaseJWTAPIView, AccessControlMixin):
+    """
+    POST /admin/users/bulk/role/ {"ids": [...], "role_id": N} : update / update_all
+
+    Роль меняется одним UPDATE для всех доступных пользователей.
+    """
+    element_name = "users"
+    owner_field = "id"
+
+    def post(self, request):
+        s = BulkRoleChangeSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(s.validated_data["ids"]))
+        role_id = s.validated_data["role_id"]
+
+        qs, resp = self.scoped_queryset(request, User.objects.filter(id__in=ids), action="update")
+        if resp:
+            return resp
+
+        with transaction.atomic():
+            states = list(qs.values_list("id", "token_version", "is_active"))
+            changed = {user_id for user_id, _, _ in states}
+            User.objects.filter(id__in=changed).update(role_id=role_id, updated_at=timezone.now())
+            User.auth_states_changed(states)
+
+        results = _bulk_results(ids, changed, "updated")
+        return Response({"updated": len(changed), "results": results}, status=status.HTTP_200_OK)
+
+
+class AdminMetricsView(BaseJWTAPIView):
+    """GET /admin/metrics/ : счётчики кэшей и пула хэширования текущего воркера (только admin)"""
+
+    def get(self, request):
+        resp = ensure_admin(request)
+        if resp:
+            return resp
+        return Response(
+            {
+                "principal_cache": principal_cache.stats(),
+                "token_cache": token_cache.stats(),
+                "password_hashing": hashing_pool.stats(),
+                "login_throttle": login_throttle.stats(),
+            },
+            status=status.HTTP_200_OK,
+        )